@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.html import format_html
-from .models import President, EmployeeAttrition
+from .models import President, EmployeeAttrition, UploadJob
 
 
 # Register EmployeeAttrition with enhanced display
@@ -80,6 +80,14 @@ class EmployeeAttritionAdmin(admin.ModelAdmin):
     retention_status_display.admin_order_field = 'is_retained'
 
 
+# Register UploadJob so stuck or failed uploads can be inspected
+@admin.register(UploadJob)
+class UploadJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'rows_parsed', 'rows_scored', 'rows_persisted', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    readonly_fields = ('created_at', 'started_at', 'finished_at')
+
+
 # Register President with UserAdmin
 @admin.register(President)
 class PresidentAdmin(UserAdmin):
@@ -0,0 +1,72 @@
+# analytics_cache.py
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from .versions import EMPLOYEE_DATA, get_version
+
+ANALYTICS_CACHE_ALIAS = getattr(settings, 'ANALYTICS_CACHE_ALIAS', 'default')
+ANALYTICS_CACHE_TIMEOUT = getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 60 * 60)
+
+# Longest a cold key's builder holds its lock; waiters give up and build it themselves after that
+ANALYTICS_LOCK_TIMEOUT = getattr(settings, 'ANALYTICS_LOCK_TIMEOUT', 30)
+LOCK_POLL_INTERVAL = 0.05
+
+# Threads of one process queue on these rather than polling the cache; striped so the set stays bounded
+_LOCAL_LOCKS = [threading.Lock() for _ in range(64)]
+
+_MISSING = object()
+
+
+def analytics_cache_key(kind, *parts):
+    """
+    Cache key for one analytics payload. It covers the employee data version
+    (so every write path invalidates it), today's date (relative ranges and
+    trend periods move with it) and the caller's `parts`.
+    """
+    version, changed_at = get_version(EMPLOYEE_DATA)
+    raw = '|'.join(str(part) for part in (changed_at, timezone.localdate(), *parts))
+    return f"analytics:{kind}:v{version}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def cached_analytics(key, build):
+    """
+    The cached value for `key`, calling build() to fill it on a miss.
+
+    A cold key is built once: threads of this process wait on a local lock,
+    and other processes sharing the cache (file-based or any shared backend)
+    wait on a lock key taken with cache.add(), polling until the value
+    appears.
+    """
+    cache = caches[ANALYTICS_CACHE_ALIAS]
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    with _LOCAL_LOCKS[hash(key) % len(_LOCAL_LOCKS)]:
+        # Another thread may have built it while we queued
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        lock_key = f'{key}:lock'
+        deadline = time.monotonic() + ANALYTICS_LOCK_TIMEOUT
+        locked = cache.add(lock_key, True, ANALYTICS_LOCK_TIMEOUT)
+        while not locked and time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            value = cache.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            locked = cache.add(lock_key, True, ANALYTICS_LOCK_TIMEOUT)
+
+        try:
+            value = build()
+            cache.set(key, value, ANALYTICS_CACHE_TIMEOUT)
+        finally:
+            if locked:
+                cache.delete(lock_key)
+        return value
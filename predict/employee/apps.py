@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class EmployeeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'employee'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (connects the analytics rollup receivers)
+
+        # Only web workers opt in (see wsgi.py/asgi.py); other commands load the model lazily, if at all
+        if settings.ATTRITION_MODEL_WARMUP:
+            from .ml_utils import predictor
+            predictor.warm_up()
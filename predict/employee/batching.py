@@ -0,0 +1,101 @@
+# batching.py
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-item requests into batched calls.
+
+    Callers submit() an item and get a Future back. One scorer thread takes
+    the first queued item, keeps collecting until `max_batch_size` items or
+    `max_wait` seconds have passed, calls `score_batch(items)` once and
+    resolves each caller's future with its own result. The thread starts on
+    first use, so it is created after a pre-forking server forks its workers.
+    """
+
+    def __init__(self, score_batch, max_batch_size=32, max_wait=0.002, stats_window=1000):
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._batches = 0
+        self._largest_batch = 0
+        self._latencies = deque(maxlen=stats_window)
+        self._batch_sizes = deque(maxlen=stats_window)
+
+    def submit(self, item):
+        """Queue one item for scoring; returns a Future resolving to its result"""
+        self._ensure_thread()
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def stats(self):
+        """Request/batch counters plus latency (ms) and batch-size figures over the recent window"""
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            batch_sizes = list(self._batch_sizes)
+            stats = {
+                'requests': self._requests,
+                'batches': self._batches,
+                'largest_batch': self._largest_batch,
+            }
+
+        stats['mean_batch_size'] = round(sum(batch_sizes) / len(batch_sizes), 2) if batch_sizes else 0
+        if latencies:
+            stats['latency_ms_p50'] = round(latencies[len(latencies) // 2] * 1000, 3)
+            stats['latency_ms_p95'] = round(latencies[int(len(latencies) * 0.95)] * 1000, 3)
+            stats['latency_ms_max'] = round(latencies[-1] * 1000, 3)
+        return stats
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._thread_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='attrition-micro-batcher', daemon=True)
+                    self._thread.start()
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            items = [item for item, _, _ in batch]
+
+            try:
+                results = self.score_batch(items)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+
+            finished = time.perf_counter()
+            with self._stats_lock:
+                self._requests += len(batch)
+                self._batches += 1
+                self._largest_batch = max(self._largest_batch, len(batch))
+                self._batch_sizes.append(len(batch))
+                self._latencies.extend(finished - submitted for _, _, submitted in batch)
@@ -0,0 +1,270 @@
+# columnar.py
+# pandas is only imported by load_columns(), so importing views (manage.py
+# check, migrations) doesn't pay for it.
+import threading
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .models import EmployeeAttrition
+from .rollups import (
+    AGE_BAND_EDGES, AGE_BAND_LABELS, RISK_BUCKET_WIDTH, RISK_BUCKETS, SALARY_BAND_WIDTH, SATISFACTION_LABELS,
+    TENURE_BAND_EDGES, TENURE_BAND_LABELS, RollupSummary, trend_period_starts,
+)
+from .versions import EMPLOYEE_DATA, EMPLOYEE_REWRITES, get_versions
+
+# analytics_api reads a process-local column snapshot instead of the rollup table
+COLUMNAR_ANALYTICS = getattr(settings, 'EMPLOYEE_COLUMNAR_ANALYTICS', True)
+
+LOAD_CHUNK_SIZE = 5000
+
+# EmployeeAttrition field -> column dtype; probability is NaN where unscored
+NUMERIC_COLUMNS = {
+    'id': np.int64,
+    'age': np.int32,
+    'years_at_company': np.int32,
+    'job_satisfaction': np.int8,
+    'joining_salary': np.int32,
+    'current_salary': np.int32,
+    'attrition_probability': np.float32,
+    'is_retained': np.bool_,
+}
+# Text fields stored as int16 codes into a per-snapshot category list, seeded from the model choices
+CATEGORY_COLUMNS = {
+    'gender': [value for value, _ in EmployeeAttrition.GENDER_CHOICES],
+    'data_source': [value for value, _ in EmployeeAttrition.DATA_SOURCE_CHOICES],
+}
+LOAD_FIELDS = [*NUMERIC_COLUMNS, *CATEGORY_COLUMNS, 'created_at']
+
+
+def load_columns(queryset, categories=None):
+    """
+    EmployeeColumns for `queryset`, oldest first. Rows are read with
+    values_list() and turned into arrays LOAD_CHUNK_SIZE at a time, so only
+    one chunk of Python tuples is alive at once.
+    """
+    import pandas as pd
+
+    categories = {field: list(values) for field, values in (categories or CATEGORY_COLUMNS).items()}
+    codes = {field: {value: code for code, value in enumerate(known)} for field, known in categories.items()}
+    dtypes = {**NUMERIC_COLUMNS, **dict.fromkeys(categories, np.int16), 'created_at': 'datetime64[us]'}
+    parts = {field: [] for field in dtypes}
+
+    rows = queryset.order_by('created_at', 'id').values_list(*LOAD_FIELDS).iterator(chunk_size=LOAD_CHUNK_SIZE)
+    while chunk := list(islice(rows, LOAD_CHUNK_SIZE)):
+        values = dict(zip(LOAD_FIELDS, zip(*chunk)))
+        for field, dtype in NUMERIC_COLUMNS.items():
+            parts[field].append(np.array(values[field], dtype=dtype))
+        for field, known in categories.items():
+            lookup = codes[field]
+            for value in set(values[field]) - lookup.keys():
+                lookup[value] = len(known)
+                known.append(value)
+            parts[field].append(np.fromiter(map(lookup.__getitem__, values[field]), dtype=np.int16, count=len(chunk)))
+        # Naive UTC instants, for ordering
+        parts['created_at'].append(
+            pd.DatetimeIndex(values['created_at'], dtype='datetime64[us, UTC]').tz_localize(None).values
+        )
+
+    columns = {
+        field: np.concatenate(chunks) if chunks else np.array([], dtype=dtypes[field])
+        for field, chunks in parts.items()
+    }
+    # Local calendar days, for date ranges and trends
+    columns['day'] = (
+        pd.DatetimeIndex(columns['created_at']).tz_localize('UTC')
+        .tz_convert(timezone.get_default_timezone_name()).tz_localize(None).values.astype('datetime64[D]')
+    )
+    return EmployeeColumns(columns, categories)
+
+
+class EmployeeColumns:
+    """
+    Employee fields as NumPy arrays sorted by (created_at, id).
+
+    A date range is a binary search over the sorted `day` column, and each
+    chart is a np.bincount over a boolean mask, so nothing goes back to the
+    database. The methods return the same structures as RollupSummary.
+    """
+
+    def __init__(self, columns, categories):
+        self.columns = columns
+        self.categories = categories
+
+    def __len__(self):
+        return len(self.columns['id'])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def between(self, start_day=None, end_day=None):
+        """The employees created from start_day to end_day (inclusive, local dates), as views"""
+        day = self['day']
+        start = 0 if start_day is None else np.searchsorted(day, np.datetime64(start_day, 'D'), 'left')
+        end = len(day) if end_day is None else np.searchsorted(day, np.datetime64(end_day, 'D'), 'right')
+        return EmployeeColumns({name: column[start:end] for name, column in self.columns.items()}, self.categories)
+
+    def append(self, other):
+        """These employees followed by `other`'s (loaded with this snapshot's categories), re-sorted if needed"""
+        columns = {name: np.concatenate([column, other[name]]) for name, column in self.columns.items()}
+        if len(self) and len(other) and other['created_at'][0] < self['created_at'][-1]:
+            order = np.lexsort((columns['id'], columns['created_at']))
+            columns = {name: column[order] for name, column in columns.items()}
+        return EmployeeColumns(columns, other.categories)
+
+    def risk_buckets(self):
+        """(scored mask, RISK_BUCKET_WIDTH bucket of each scored probability), as the rollup stores them"""
+        probability = self['attrition_probability']
+        scored = ~np.isnan(probability)
+        buckets = np.clip(probability[scored] // RISK_BUCKET_WIDTH, 0, RISK_BUCKETS - 1).astype(np.intp)
+        return scored, buckets
+
+    def at_risk(self):
+        return self['attrition_probability'] >= 50
+
+    def headline_stats(self):
+        scored, buckets = self.risk_buckets()
+        low, medium, high = np.bincount(np.searchsorted([50, 75], buckets * RISK_BUCKET_WIDTH, 'right'),
+                                        minlength=3).tolist()
+        total = len(self)
+        retained = int(np.count_nonzero(self['is_retained']))
+        return {
+            'total': total,
+            'retained': retained,
+            'attrition': total - retained,
+            'high_risk': high,
+            'medium_risk': medium,
+            'low_risk': low,
+            'avg_risk': float(self['attrition_probability'][scored].astype(np.float64).mean()) if scored.any() else None,
+        }
+
+    def gender_analysis(self):
+        if not len(self):
+            return {'labels': [], 'data': []}
+
+        labels = self.categories['gender']
+        attrition = np.bincount(self['gender'][~self['is_retained']], minlength=len(labels))
+        genders = sorted((labels[code], int(count)) for code, count in enumerate(attrition) if count)
+
+        if not genders:
+            return {'labels': ['Male', 'Female', 'Other'], 'data': [0, 0, 0]}
+        return {
+            'labels': [gender or 'Not Specified' for gender, _ in genders],
+            'data': [count for _, count in genders],
+        }
+
+    def satisfaction_analysis(self):
+        if not len(self):
+            return {'labels': [], 'data': []}
+
+        satisfaction = self['job_satisfaction']
+        valid = (satisfaction >= 1) & (satisfaction <= len(SATISFACTION_LABELS))
+        counts = np.bincount(satisfaction[valid], minlength=len(SATISFACTION_LABELS) + 1)
+        return {'labels': SATISFACTION_LABELS, 'data': counts[1:].tolist()}
+
+    def trend(self, periods=12, granularity='month'):
+        starts, label_format = trend_period_starts(periods, granularity, timezone.localdate())
+        recent = self.between(starts[0])
+        period = np.searchsorted(np.array(starts, dtype='datetime64[D]'), recent['day'], 'right') - 1
+        totals = np.bincount(period, minlength=periods)
+        at_risk = np.bincount(period[recent.at_risk()], minlength=periods)
+
+        return {
+            'labels': [start.strftime(label_format) for start in starts],
+            'attrition_rates': [
+                round((risk / total) * 100, 1) if total else 0 for risk, total in zip(at_risk.tolist(), totals.tolist())
+            ],
+        }
+
+    def distributions(self):
+        """Age group, experience, salary and risk score histograms, as RollupSummary.distributions"""
+        names = ['age_group_data', 'experience_data', 'salary_distribution', 'risk_score_distribution']
+        if not len(self):
+            return {name: {'labels': [], 'data': []} for name in names}
+
+        at_risk = self.at_risk()
+        age_bands = np.searchsorted(AGE_BAND_EDGES, self['age'][at_risk], 'right')
+        tenure_bands = np.searchsorted(TENURE_BAND_EDGES, self['years_at_company'][at_risk], 'right')
+        _, buckets = self.risk_buckets()
+
+        salary_bands = self['current_salary'] // SALARY_BAND_WIDTH
+        low = int(salary_bands.min())
+        salary_counts = np.bincount(salary_bands - low)
+
+        return {
+            'age_group_data': {
+                'labels': AGE_BAND_LABELS,
+                'data': np.bincount(age_bands, minlength=len(AGE_BAND_LABELS) + 1)[1:].tolist(),
+            },
+            'experience_data': {
+                'labels': TENURE_BAND_LABELS,
+                'data': np.bincount(tenure_bands, minlength=len(TENURE_BAND_LABELS)).tolist(),
+            },
+            'salary_distribution': RollupSummary._salary_ranges(
+                {low + band: int(count) for band, count in enumerate(salary_counts) if count}, ranges=7,
+            ),
+            'risk_score_distribution': {
+                'labels': [f'{i}-{i+10}%' for i in range(0, 100, 10)],
+                'data': np.bincount(buckets * RISK_BUCKET_WIDTH // 10, minlength=10).tolist(),
+            },
+        }
+
+
+class ColumnarSnapshot:
+    """
+    Process-local EmployeeColumns of the whole employee table.
+
+    current() checks the employee data versions (one query) and refreshes
+    only when they moved: rows above the id watermark are appended, staying
+    in order when they are newer than the created_at watermark, and any
+    update or delete (EMPLOYEE_REWRITES, bumped by signals.py and ingest.py)
+    triggers a full reload.
+    """
+
+    def __init__(self):
+        self.columns = None
+        self.versions = None
+        self.loads = 0
+        self.appends = 0
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.columns = None
+            self.versions = None
+            self.loads = 0
+            self.appends = 0
+
+    def current(self):
+        versions = get_versions(EMPLOYEE_DATA, EMPLOYEE_REWRITES)
+        columns = self.columns
+        if columns is not None and versions == self.versions:
+            return columns
+
+        with self._lock:
+            if self.columns is None or versions[1] != self.versions[1]:
+                self.columns = self._reload()
+            elif versions != self.versions:
+                self.columns = self._append_new_rows()
+            self.versions = versions
+            return self.columns
+
+    def _reload(self):
+        self.loads += 1
+        return load_columns(EmployeeAttrition.objects.all())
+
+    def _append_new_rows(self):
+        columns = self.columns
+        max_pk = int(columns['id'].max()) if len(columns) else 0
+        new_rows = load_columns(EmployeeAttrition.objects.filter(pk__gt=max_pk), columns.categories)
+        self.appends += 1
+        return columns.append(new_rows)
+
+    def stats(self):
+        return {'rows': len(self.columns) if self.columns is not None else 0,
+                'loads': self.loads, 'appends': self.appends}
+
+
+employee_columns = ColumnarSnapshot()
@@ -0,0 +1,207 @@
+# exports.py
+import csv
+import zlib
+from itertools import islice
+
+from django.conf import settings
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+
+# (CSV header, EmployeeAttrition field) for the attrition / retention downloads
+EXPORT_COLUMNS = [
+    ('Employee ID', 'employee_id'),
+    ('Name', 'name'),
+    ('Age', 'age'),
+    ('Gender', 'gender'),
+    ('Marital Status', 'marital_status'),
+    ('Job Satisfaction', 'job_satisfaction'),
+    ('Working Hours', 'working_hours'),
+    ('Years at Company', 'years_at_company'),
+    ('Distance From Home', 'distance_from_home'),
+    ('Environment Satisfaction', 'environment_satisfaction'),
+    ('Health Condition', 'health_condition'),
+    ('Expectations From Company', 'expectations_from_company'),
+    ('Joining Salary', 'joining_salary'),
+    ('Current Salary', 'current_salary'),
+    ('Education', 'education'),
+    ('Attrition Risk (%)', 'attrition_probability'),
+    ('Data Source', 'data_source'),
+    ('Date Added', 'created_at'),
+]
+EXPORT_HEADERS = [header for header, _ in EXPORT_COLUMNS]
+EXPORT_FIELDS = [field for _, field in EXPORT_COLUMNS]
+
+EXPORT_CHUNK_SIZE = getattr(settings, 'EMPLOYEE_EXPORT_CHUNK_SIZE', 2000)
+
+# Arrow/Parquet column types; text fields are strings
+INT_FIELDS = {'age', 'job_satisfaction', 'working_hours', 'years_at_company', 'distance_from_home',
+              'environment_satisfaction', 'joining_salary', 'current_salary'}
+
+# Uncompressed CSV bytes collected before each gzip compress() call
+GZIP_BLOCK_SIZE = 64 * 1024
+
+PROBABILITY_INDEX = EXPORT_FIELDS.index('attrition_probability')
+CREATED_AT_INDEX = EXPORT_FIELDS.index('created_at')
+
+
+class Echo:
+    """File-like object whose write() hands the line back, so csv.writer output can be yielded"""
+
+    def write(self, value):
+        return value
+
+
+class ChunkSink:
+    """Write-only file object for pyarrow writers; drain() hands over what was written so far"""
+
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def export_rows(queryset, chunk_size=None):
+    """Formatted export rows straight from values_list(), without building model instances"""
+    rows = queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size or EXPORT_CHUNK_SIZE)
+    for row in rows:
+        row = list(row)
+        probability = row[PROBABILITY_INDEX]
+        row[PROBABILITY_INDEX] = f"{probability:.1f}%" if probability is not None else ''
+        row[CREATED_AT_INDEX] = row[CREATED_AT_INDEX].strftime('%Y-%m-%d %H:%M')
+        yield row
+
+
+def stream_csv(queryset, chunk_size=None):
+    """Yield the CSV export of `queryset` one line at a time"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_HEADERS)
+    for row in export_rows(queryset, chunk_size):
+        yield writer.writerow(row)
+
+
+def stream_csv_gz(queryset, chunk_size=None):
+    """The CSV export as a gzip stream, compressed in GZIP_BLOCK_SIZE blocks"""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    block, size = [], 0
+
+    for line in stream_csv(queryset, chunk_size):
+        data = line.encode()
+        block.append(data)
+        size += len(data)
+        if size >= GZIP_BLOCK_SIZE:
+            yield compressor.compress(b''.join(block))
+            block, size = [], 0
+
+    yield compressor.compress(b''.join(block)) + compressor.flush()
+
+
+def arrow_schema():
+    import pyarrow as pa
+
+    def column_type(field):
+        if field in INT_FIELDS:
+            return pa.int32()
+        if field == 'attrition_probability':
+            return pa.float64()
+        if field == 'created_at':
+            return pa.timestamp('us', tz='UTC')
+        return pa.string()
+
+    return pa.schema([(field, column_type(field)) for field in EXPORT_FIELDS])
+
+
+def record_batches(queryset, schema, chunk_size=None):
+    """Arrow record batches of chunk_size rows, transposed straight from values_list() tuples"""
+    import pyarrow as pa
+
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    rows = queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            return
+        columns = zip(*batch)
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+            schema=schema,
+        )
+
+
+def stream_arrow(queryset, writer_factory, chunk_size=None):
+    """Run a pyarrow writer over the record batches, yielding its output after every batch"""
+    schema = arrow_schema()
+    sink = ChunkSink()
+    writer = writer_factory(sink, schema)
+
+    for batch in record_batches(queryset, schema, chunk_size):
+        writer.write_batch(batch)
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
+
+
+def stream_parquet(queryset, chunk_size=None):
+    """Parquet file with one row group per chunk"""
+    import pyarrow.parquet as pq
+    return stream_arrow(queryset, lambda sink, schema: pq.ParquetWriter(sink, schema), chunk_size)
+
+
+def stream_arrow_ipc(queryset, chunk_size=None):
+    """Arrow IPC stream format, one record batch per chunk"""
+    import pyarrow as pa
+    return stream_arrow(queryset, pa.ipc.new_stream, chunk_size)
+
+
+# ?format= -> (generator, content type, file extension, needs pyarrow)
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv', 'csv', False),
+    'csv.gz': (stream_csv_gz, 'application/gzip', 'csv.gz', False),
+    'parquet': (stream_parquet, 'application/vnd.apache.parquet', 'parquet', True),
+    'arrow': (stream_arrow_ipc, 'application/vnd.apache.arrow.stream', 'arrows', True),
+}
+
+
+def export_format_error(export_format):
+    """A 400 response if `export_format` can't be served, else None"""
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest(f"Unsupported export format (use one of: {', '.join(EXPORT_FORMATS)})")
+
+    if EXPORT_FORMATS[export_format][3]:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return HttpResponseBadRequest(f"The {export_format} export format requires pyarrow")
+    return None
+
+
+def export_response(queryset, basename, export_format='csv', tee=None):
+    """
+    Streaming download of `queryset` in one of EXPORT_FORMATS: the first
+    bytes go out as soon as the first chunk is read and memory stays flat
+    however many rows there are. `tee`, if given, wraps the chunk stream
+    (used to write a snapshot file while streaming).
+    """
+    error = export_format_error(export_format)
+    if error:
+        return error
+
+    stream, content_type, extension, _ = EXPORT_FORMATS[export_format]
+    chunks = stream(queryset)
+    if tee is not None:
+        chunks = tee(chunks)
+
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{basename}.{extension}"'
+    return response
@@ -0,0 +1,107 @@
+# histograms.py
+from django.db.models import Count, Max, Min, Q
+
+
+def equal_width_edges(low, high, bins):
+    """`bins` equal-width integer bin starts from low to high; the last bin is open-ended"""
+    width = (high - low) / bins
+    return [int(low + i * width) for i in range(bins)] + [None]
+
+
+def default_label(start, end):
+    if start is None:
+        return f'<{end}'
+    if end is None:
+        return f'{start}+'
+    return f'{start}-{end}'
+
+
+class Histogram:
+    """
+    Bucket counts for one numeric field.
+
+    `edges` are bin boundaries: bin i holds edges[i] <= value < edges[i + 1],
+    and a None edge leaves that side open. Pass `bins` instead of `edges` to
+    get equal-width bins between the field's min and max. `filter` (a Q)
+    restricts which rows are counted, and `label` turns (start, end) into the
+    bin's label when no explicit `labels` are given.
+    """
+
+    def __init__(self, field, edges=None, bins=None, labels=None, label=None, filter=None):
+        if (edges is None) == (bins is None):
+            raise ValueError("Histogram needs either edges or bins")
+        self.field = field
+        self.edges = edges
+        self.bins = bins
+        self.labels = labels
+        self.label = label or default_label
+        self.filter = filter
+
+    def bin_filter(self, start, end):
+        condition = Q()
+        if start is not None:
+            condition &= Q(**{f'{self.field}__gte': start})
+        if end is not None:
+            condition &= Q(**{f'{self.field}__lt': end})
+        if self.filter is not None:
+            condition &= self.filter
+        return condition
+
+    def aggregates(self, name, edges):
+        """One conditional COUNT per bin, keyed name__<bin>"""
+        return {
+            f'{name}__{i}': Count('pk', filter=self.bin_filter(start, end))
+            for i, (start, end) in enumerate(zip(edges, edges[1:]))
+        }
+
+    def result(self, name, edges, row):
+        bins = list(zip(edges, edges[1:]))
+        labels = self.labels or [self.label(start, end) for start, end in bins]
+        return {
+            'labels': list(labels),
+            'data': [row[f'{name}__{i}'] for i in range(len(bins))],
+        }
+
+
+def compute_histograms(queryset, histograms):
+    """
+    Evaluate several named Histograms over a queryset.
+
+    Every fixed-edge histogram is a set of conditional COUNTs in a single
+    aggregate query, which also fetches min/max for the equal-width ones;
+    those are counted in one more query. Returns {name: {'labels', 'data'}}
+    plus the row count under 'total'.
+    """
+    queryset = queryset.order_by()
+    fixed = {name: hist for name, hist in histograms.items() if hist.edges is not None}
+    dynamic = {name: hist for name, hist in histograms.items() if hist.edges is None}
+
+    aggregates = {'total': Count('pk')}
+    for name, hist in fixed.items():
+        aggregates.update(hist.aggregates(name, hist.edges))
+    for name, hist in dynamic.items():
+        aggregates[f'{name}__min'] = Min(hist.field)
+        aggregates[f'{name}__max'] = Max(hist.field)
+
+    row = queryset.aggregate(**aggregates)
+    results = {'total': row['total']}
+    for name, hist in fixed.items():
+        results[name] = hist.result(name, hist.edges, row)
+
+    if dynamic and row['total']:
+        edges = {
+            name: equal_width_edges(row[f'{name}__min'], row[f'{name}__max'], hist.bins)
+            for name, hist in dynamic.items()
+        }
+        aggregates = {}
+        for name, hist in dynamic.items():
+            aggregates.update(hist.aggregates(name, edges[name]))
+
+        row = queryset.aggregate(**aggregates)
+        for name, hist in dynamic.items():
+            results[name] = hist.result(name, edges[name], row)
+
+    for name in dynamic:
+        results.setdefault(name, {'labels': [], 'data': []})
+
+    return results
@@ -0,0 +1,220 @@
+# ingest.py
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import connection, transaction
+
+from .ml_utils import pack_contributions
+from .models import EmployeeAttrition
+from .rollups import SOURCE_FIELDS, apply_rollup_changes, source_row
+from .search import index_employees
+from .versions import EMPLOYEE_REWRITES, bump_version
+
+# CSV column -> EmployeeAttrition field
+CSV_FIELD_MAP = {
+    'Age': 'age',
+    'Gender': 'gender',
+    'MaritalStatus': 'marital_status',
+    'JobSatisfaction': 'job_satisfaction',
+    'WorkingHours': 'working_hours',
+    'YearsAtCompany': 'years_at_company',
+    'DistanceFromHome': 'distance_from_home',
+    'EnvironmentSatisfaction': 'environment_satisfaction',
+    'HealthCondition': 'health_condition',
+    'ExpectationsFromCompany': 'expectations_from_company',
+    'JoiningSalary': 'joining_salary',
+    'CurrentSalary': 'current_salary',
+    'Education': 'education',
+}
+
+# Fields overwritten when an uploaded employee already exists (created_at is kept)
+UPSERT_FIELDS = ['name', *CSV_FIELD_MAP.values(), 'attrition', 'attrition_probability',
+                 'is_retained', 'model_version', 'risk_contributions', 'data_source']
+
+# Explicit dtypes so pandas doesn't fall back to int64/object for every column
+CSV_DTYPES = {
+    'EmployeeID': 'str',
+    'Name': 'str',
+    'Age': 'int16',
+    'Gender': 'category',
+    'MaritalStatus': 'category',
+    'JobSatisfaction': 'int8',
+    'WorkingHours': 'int16',
+    'YearsAtCompany': 'int16',
+    'DistanceFromHome': 'int16',
+    'EnvironmentSatisfaction': 'int8',
+    'HealthCondition': 'category',
+    'ExpectationsFromCompany': 'category',
+    'JoiningSalary': 'int32',
+    'CurrentSalary': 'int32',
+    'Education': 'category',
+}
+
+INTEGER_COLUMNS = [column for column, dtype in CSV_DTYPES.items() if dtype.startswith('int')]
+
+DEFAULT_BATCH_SIZE = getattr(settings, 'EMPLOYEE_BULK_BATCH_SIZE', 1000)
+DEFAULT_CHUNK_SIZE = getattr(settings, 'EMPLOYEE_CSV_CHUNK_SIZE', 10000)
+
+
+def read_csv_chunks(csv_file, chunksize=None):
+    """
+    Stream an uploaded CSV as DataFrames of at most `chunksize` rows.
+
+    Only the columns we store are read, with compact dtypes, so memory
+    stays flat no matter how many rows the file has. A value that doesn't
+    fit its integer column raises ValueError naming the line and column.
+    """
+    chunksize = chunksize or DEFAULT_CHUNK_SIZE
+    # Integers are parsed wide and narrowed per chunk: pandas silently wraps values that overflow the dtype
+    reader = pd.read_csv(
+        csv_file,
+        usecols=lambda column: column in CSV_DTYPES,
+        dtype={**CSV_DTYPES, **dict.fromkeys(INTEGER_COLUMNS, 'int64')},
+        chunksize=chunksize,
+    )
+    try:
+        for chunk in reader:
+            for column in INTEGER_COLUMNS:
+                if column in chunk.columns:
+                    limits = np.iinfo(CSV_DTYPES[column])
+                    values = chunk[column].to_numpy()
+                    if values.size and (values.min() < limits.min or values.max() > limits.max):
+                        raise ValueError(f"{column} is out of range")
+                    chunk[column] = values.astype(CSV_DTYPES[column])
+            yield chunk
+    except (ValueError, OverflowError) as e:
+        # pandas doesn't say which cell it choked on, so look for it
+        raise ValueError(find_bad_integer(csv_file, chunksize) or f"Could not read the CSV: {e}") from e
+
+
+def find_bad_integer(csv_file, chunksize=None):
+    """Describe the first value in the CSV's integer columns that isn't a whole number in range, or None"""
+    try:
+        csv_file.seek(0)
+    except (AttributeError, OSError, ValueError):
+        return None
+
+    reader = pd.read_csv(
+        csv_file,
+        usecols=lambda column: column in INTEGER_COLUMNS,
+        dtype=str,
+        keep_default_na=False,
+        chunksize=chunksize or DEFAULT_CHUNK_SIZE,
+    )
+    rows_before = 0
+    for chunk in reader:
+        for column in chunk.columns:
+            values = chunk[column].str.strip()
+            numbers = pd.to_numeric(values.where(values.str.fullmatch(r'[+-]?\d+')), errors='coerce')
+            limits = np.iinfo(CSV_DTYPES[column])
+            bad = (numbers.isna() | (numbers < limits.min) | (numbers > limits.max)).to_numpy()
+            if bad.any():
+                row = int(bad.argmax())
+                value = chunk[column].iloc[row]
+                line = rows_before + row + 2  # 1-based, after the header line
+                if not value.strip():
+                    return f"Line {line}: {column} is missing"
+                return f"Line {line}: {column} must be a whole number from {limits.min} to {limits.max}, got {value!r}"
+        rows_before += len(chunk)
+    return None
+
+
+def build_employee_objects(df, attrition_predictions, attrition_probabilities, contributions=None, model_version=''):
+    """Build unsaved EmployeeAttrition instances from a scored CSV DataFrame (and its per-row contributions)"""
+    employees = []
+    has_name = 'Name' in df.columns
+    if contributions is None:
+        contributions = [None] * len(df)
+
+    for row, attrition, probability, row_contributions in zip(
+        df.to_dict('records'), attrition_predictions, attrition_probabilities, contributions
+    ):
+        probability = float(probability)
+        fields = {field: row[column] for column, field in CSV_FIELD_MAP.items()}
+        employees.append(EmployeeAttrition(
+            employee_id=str(row['EmployeeID']),
+            name=row['Name'] if has_name else 'Unknown',
+            attrition=int(attrition),
+            attrition_probability=probability,
+            is_retained=probability < 25,
+            model_version=model_version,
+            risk_contributions=pack_contributions(row_contributions) if row_contributions is not None else None,
+            data_source='CSV',
+            **fields,
+        ))
+
+    return employees
+
+
+def bulk_upsert_employees(employees, batch_size=None):
+    """
+    Insert or update employees by employee_id in batches.
+
+    Each batch runs in its own transaction: one query to find which
+    employee_ids already exist, then a single upsert (or bulk_create +
+    bulk_update where the backend has no ON CONFLICT support), then the
+    analytics rollup is moved from the stored rows to the new ones, the
+    search index is refreshed and the employee data version is bumped
+    (plus the rewrite version when the batch updated existing rows).
+    Returns (created_count, updated_count).
+    """
+    batch_size = batch_size or DEFAULT_BATCH_SIZE
+
+    # Later rows win, like the old sequential update_or_create loop
+    unique = {}
+    for employee in employees:
+        unique.pop(employee.employee_id, None)
+        unique[employee.employee_id] = employee
+    employees = list(unique.values())
+
+    created_count = 0
+    updated_count = 0
+
+    for start in range(0, len(employees), batch_size):
+        batch = employees[start:start + batch_size]
+
+        with transaction.atomic():
+            stored = {
+                row['employee_id']: row
+                for row in EmployeeAttrition.objects
+                .filter(employee_id__in=[emp.employee_id for emp in batch])
+                .values('employee_id', 'id', *SOURCE_FIELDS)
+            }
+            existing = {employee_id: row['id'] for employee_id, row in stored.items()}
+
+            if connection.features.supports_update_conflicts_with_target:
+                EmployeeAttrition.objects.bulk_create(
+                    batch,
+                    update_conflicts=True,
+                    unique_fields=['employee_id'],
+                    update_fields=UPSERT_FIELDS,
+                )
+            else:
+                new_rows = [emp for emp in batch if emp.employee_id not in existing]
+                old_rows = [emp for emp in batch if emp.employee_id in existing]
+                for emp in old_rows:
+                    emp.pk = existing[emp.employee_id]
+                EmployeeAttrition.objects.bulk_create(new_rows)
+                EmployeeAttrition.objects.bulk_update(old_rows, UPSERT_FIELDS)
+
+            # Updated rows keep their stored created_at, so they stay on the same rollup day
+            added = [source_row(emp) for emp in batch]
+            for row, emp in zip(added, batch):
+                if emp.employee_id in stored:
+                    row['created_at'] = stored[emp.employee_id]['created_at']
+            apply_rollup_changes(added=added, removed=stored.values())
+
+            # New rows only get their ids from the database
+            index_employees(
+                EmployeeAttrition.objects
+                .filter(employee_id__in=[emp.employee_id for emp in batch])
+                .values_list('id', 'employee_id', 'name')
+            )
+            bump_version()
+            if stored:
+                bump_version(EMPLOYEE_REWRITES)
+
+        updated_count += len(existing)
+        created_count += len(batch) - len(existing)
+
+    return created_count, updated_count
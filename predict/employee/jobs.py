@@ -0,0 +1,124 @@
+# jobs.py
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from .ingest import DEFAULT_BATCH_SIZE, build_employee_objects, bulk_upsert_employees, read_csv_chunks
+from .ml_utils import predictor
+from .models import UploadJob
+
+PREVIEW_SIZE = 100
+
+# Seconds without a progress save after which a running job's worker is presumed dead
+STALE_AFTER = getattr(settings, 'UPLOAD_JOB_STALE_AFTER', 300)
+# Claims per job before a job that keeps killing its worker is marked failed
+MAX_ATTEMPTS = getattr(settings, 'UPLOAD_JOB_MAX_ATTEMPTS', 3)
+
+
+def requeue_stale_jobs():
+    """Put running jobs whose worker stopped beating back to pending (or fail them after MAX_ATTEMPTS)"""
+    now = timezone.now()
+    stale = UploadJob.objects.filter(status=UploadJob.STATUS_RUNNING,
+                                     heartbeat_at__lt=now - timedelta(seconds=STALE_AFTER))
+    stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status=UploadJob.STATUS_FAILED, error="The upload worker stopped while processing this file", finished_at=now,
+    )
+    return stale.update(status=UploadJob.STATUS_PENDING)
+
+
+def claim_next_job():
+    """Atomically move the oldest pending job to running, or return None"""
+    requeue_stale_jobs()
+    for job in UploadJob.objects.filter(status=UploadJob.STATUS_PENDING).order_by('created_at')[:5]:
+        # Only one worker wins the conditional UPDATE; a requeued job starts its counters over
+        now = timezone.now()
+        claimed = UploadJob.objects.filter(pk=job.pk, status=UploadJob.STATUS_PENDING).update(
+            status=UploadJob.STATUS_RUNNING,
+            started_at=now,
+            heartbeat_at=now,
+            attempts=F('attempts') + 1,
+            rows_parsed=0, rows_scored=0, rows_persisted=0, created_count=0, updated_count=0,
+            retained_count=0, low_risk_count=0, medium_risk_count=0, high_risk_count=0,
+            preview_ids=[], error='',
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def _save_progress(job, *fields):
+    job.heartbeat_at = timezone.now()
+    job.save(update_fields=[*fields, 'heartbeat_at'])
+
+
+def process_upload_job(job):
+    """
+    Parse, score and persist one uploaded CSV, recording progress on the job.
+
+    The file is streamed in chunks; each chunk is scored and saved before
+    the next one is read.
+    """
+    try:
+        with job.file.open('rb') as csv_file:
+            # Contributions give the reports page its top drivers without re-running SHAP per view
+            chunks = predictor.predict_attrition_chunks(read_csv_chunks(csv_file), explain=True)
+
+            for df, attrition_predictions, attrition_probabilities, contributions, model_version in chunks:
+                probabilities = np.asarray(attrition_probabilities, dtype=float)
+                job.rows_parsed += len(df)
+                job.rows_scored += len(df)
+                job.retained_count += int((probabilities < 25).sum())
+                job.low_risk_count += int((probabilities < 50).sum())
+                job.medium_risk_count += int(((probabilities >= 50) & (probabilities < 75)).sum())
+                job.high_risk_count += int((probabilities >= 75).sum())
+                _save_progress(job, 'rows_parsed', 'rows_scored', 'retained_count', 'low_risk_count',
+                               'medium_risk_count', 'high_risk_count')
+
+                employees = build_employee_objects(
+                    df, attrition_predictions, attrition_probabilities, contributions, model_version
+                )
+                if len(job.preview_ids) < PREVIEW_SIZE:
+                    job.preview_ids += [emp.employee_id for emp in employees[:PREVIEW_SIZE - len(job.preview_ids)]]
+
+                for start in range(0, len(employees), DEFAULT_BATCH_SIZE):
+                    batch = employees[start:start + DEFAULT_BATCH_SIZE]
+                    created_count, updated_count = bulk_upsert_employees(batch)
+                    job.created_count += created_count
+                    job.updated_count += updated_count
+                    job.rows_persisted += len(batch)
+                    _save_progress(job, 'created_count', 'updated_count', 'rows_persisted')
+
+        job.status = UploadJob.STATUS_DONE
+
+    except Exception as e:
+        print(f"❌ Upload job {job.pk} failed: {e}")
+        job.status = UploadJob.STATUS_FAILED
+        job.error = str(e)
+
+    job.finished_at = timezone.now()
+    _save_progress(job, 'status', 'error', 'preview_ids', 'finished_at')
+    return job
+
+
+def run_worker(poll_interval=2.0, once=False):
+    """Poll the database for pending upload jobs and process them one at a time"""
+    while True:
+        close_old_connections()
+        # Pick up a newly activated model version between jobs, so each job is scored by one version
+        predictor.reload_if_changed()
+        job = claim_next_job()
+
+        if job is not None:
+            print(f"⚙️ Processing upload job {job.pk}")
+            process_upload_job(job)
+            continue
+
+        if once:
+            return
+        time.sleep(poll_interval)
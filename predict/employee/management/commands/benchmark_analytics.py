@@ -0,0 +1,114 @@
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from employee.columnar import ColumnarSnapshot
+from employee.management.commands.benchmark_model import make_sample_frame, time_call
+from employee.models import EmployeeAttrition
+from employee.rollups import RollupSummary, rebuild_rollups
+from employee.versions import bump_version
+from employee.views import (
+    get_distribution_analysis, get_gender_analysis, get_headline_stats, get_monthly_trend_analysis,
+    get_satisfaction_analysis,
+)
+
+CSV_FIELDS = {
+    'Age': 'age', 'Gender': 'gender', 'MaritalStatus': 'marital_status', 'JobSatisfaction': 'job_satisfaction',
+    'WorkingHours': 'working_hours', 'YearsAtCompany': 'years_at_company', 'DistanceFromHome': 'distance_from_home',
+    'EnvironmentSatisfaction': 'environment_satisfaction', 'HealthCondition': 'health_condition',
+    'ExpectationsFromCompany': 'expectations_from_company', 'JoiningSalary': 'joining_salary',
+    'CurrentSalary': 'current_salary', 'Education': 'education',
+}
+
+
+def make_employees(n_rows, first_id, seed):
+    """Sample EmployeeAttrition rows created over the last two years"""
+    rng = np.random.default_rng(seed)
+    frame = make_sample_frame(n_rows, seed=seed).rename(columns=CSV_FIELDS)
+    probabilities = rng.uniform(0, 100, n_rows).round(2)
+    now = timezone.now()
+    created = rng.integers(0, 730 * 24 * 3600, n_rows)
+
+    return [
+        EmployeeAttrition(
+            employee_id=f'BENCH-{first_id + i}',
+            attrition_probability=probability,
+            is_retained=probability < 25,
+            data_source='CSV',
+            created_at=now - timedelta(seconds=int(seconds)),
+            **fields,
+        )
+        for i, (fields, probability, seconds) in enumerate(zip(frame.to_dict('records'), probabilities, created))
+    ]
+
+
+def orm_charts():
+    employees = EmployeeAttrition.objects.all()
+    return (get_headline_stats(employees), get_gender_analysis(employees), get_satisfaction_analysis(employees),
+            get_monthly_trend_analysis(employees), get_distribution_analysis(employees))
+
+
+def summary_charts(summary):
+    return (summary.headline_stats(), summary.gender_analysis(), summary.satisfaction_analysis(),
+            summary.trend(), summary.distributions())
+
+
+class Command(BaseCommand):
+    help = ("Benchmark analytics chart computation: raw-table ORM aggregates vs the daily rollup vs the "
+            "in-memory columnar snapshot. Sample rows are added inside a transaction that is rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000],
+                            help="Employee table sizes to benchmark")
+        parser.add_argument('--append', type=int, default=1000,
+                            help="Rows added before timing the snapshot's incremental refresh")
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'rows':>9} {'ORM ms':>9} {'rollup ms':>10} {'columns ms':>11} {'load ms':>9} "
+            f"{'append ms':>10} {'MB':>6} {'vs ORM':>7}"
+        )
+        self.next_id = 0
+        with transaction.atomic():
+            for n_rows in sorted(options['rows']):
+                self.bench(n_rows, options['append'])
+            transaction.set_rollback(True)
+
+    def add_employees(self, n_rows, seed):
+        # bulk_create skips the signals, like a raw import; the caller rebuilds or bumps what it needs
+        EmployeeAttrition.objects.bulk_create(make_employees(n_rows, self.next_id, seed), batch_size=5000)
+        self.next_id += n_rows
+
+    def bench(self, n_rows, append):
+        missing = n_rows - EmployeeAttrition.objects.count()
+        if missing < 0:
+            self.stdout.write(f"{n_rows:>9} skipped: the table already holds more rows")
+            return
+        self.add_employees(missing, seed=n_rows)
+        rebuild_rollups()
+        bump_version()
+
+        orm = time_call(orm_charts)
+        rollup = time_call(lambda: summary_charts(RollupSummary.load()))
+
+        snapshot = ColumnarSnapshot()
+        start = time.perf_counter()
+        columns = snapshot.current()
+        load = time.perf_counter() - start
+        columnar = time_call(lambda: summary_charts(snapshot.current()))
+        size = sum(column.nbytes for column in columns.columns.values()) / 2 ** 20
+
+        self.add_employees(append, seed=n_rows + 1)
+        bump_version()
+        start = time.perf_counter()
+        snapshot.current()
+        appended = time.perf_counter() - start
+
+        self.stdout.write(
+            f"{n_rows:>9} {orm * 1000:>9.1f} {rollup * 1000:>10.1f} {columnar * 1000:>11.2f} {load * 1000:>9.0f} "
+            f"{appended * 1000:>10.1f} {size:>6.1f} {orm / columnar:>6.0f}x"
+        )
@@ -0,0 +1,223 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from employee.ml_utils import NATIVE_MODEL_PATH, PICKLED_MODEL_PATH, LoadedModel, predictor
+from employee.tree_model import CompiledTreeModel
+from employee.models import EmployeeAttrition
+
+
+def make_sample_frame(n_rows, seed=0):
+    """Random employee rows covering every category the forms and CSVs accept"""
+    rng = np.random.default_rng(seed)
+
+    def choice(choices):
+        return rng.choice([value for value, _ in choices], n_rows)
+
+    return pd.DataFrame({
+        'Age': rng.integers(22, 60, n_rows),
+        'Gender': choice(EmployeeAttrition.GENDER_CHOICES),
+        'MaritalStatus': choice(EmployeeAttrition.MARITAL_STATUS_CHOICES),
+        'JobSatisfaction': rng.integers(1, 6, n_rows),
+        'WorkingHours': rng.integers(35, 60, n_rows),
+        'YearsAtCompany': rng.integers(0, 25, n_rows),
+        'DistanceFromHome': rng.integers(1, 30, n_rows),
+        'EnvironmentSatisfaction': rng.integers(1, 6, n_rows),
+        'HealthCondition': choice(EmployeeAttrition.HEALTH_CONDITION_CHOICES),
+        'ExpectationsFromCompany': choice(EmployeeAttrition.EXPECTATIONS_CHOICES),
+        'JoiningSalary': rng.integers(20000, 60000, n_rows),
+        'CurrentSalary': rng.integers(30000, 100000, n_rows),
+        'Education': choice(EmployeeAttrition.EDUCATION_CHOICES),
+    })
+
+
+# Run in a fresh interpreter so each loader pays its own imports (Linux: reads /proc).
+# Prints the cold load (imports included), a second load in the same process (a
+# hot reload), and resident memory growth over the first load.
+LOAD_PROBE = """
+import json, resource, sys, time
+import django
+django.setup()
+from employee.ml_utils import LoadedModel
+
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 2 ** 20
+
+loader, path = getattr(LoadedModel, sys.argv[1]), sys.argv[2]
+rss = rss_mb()
+start = time.perf_counter()
+loaded = loader(path)
+cold = time.perf_counter() - start
+rss = rss_mb() - rss
+start = time.perf_counter()
+loader(path)
+print(json.dumps({'cold': cold, 'reload': time.perf_counter() - start, 'rss_mb': rss}))
+"""
+
+
+def time_call(func, min_seconds=0.5):
+    """Best-of-N wall time of func() in seconds, repeating for at least min_seconds"""
+    best = float('inf')
+    deadline = time.perf_counter() + min_seconds
+    while True:
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+        if time.perf_counter() >= deadline:
+            return best
+
+
+class Command(BaseCommand):
+    help = "Benchmark feature encoding throughput and inference latency for the attrition model"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1, 100, 10000, 100000],
+                            help="Batch sizes to benchmark")
+        parser.add_argument('--clients', type=int, default=32,
+                            help="Concurrent feedback-form submitters for the microbatch section")
+        parser.add_argument('--only', choices=['encoder', 'inference', 'compiled', 'microbatch', 'cache', 'load'],
+                            help="Run a single benchmark section")
+        parser.add_argument('--load-runs', type=int, default=3,
+                            help="Fresh processes per artifact format for the load section (best run is shown)")
+
+    def handle(self, *args, **options):
+        predictor.ensure_loaded()
+        if predictor.model is None:
+            self.stderr.write("Model is not loaded")
+            return
+
+        sections = (
+            [options['only']] if options['only'] else ['encoder', 'inference', 'compiled', 'microbatch', 'cache', 'load']
+        )
+        for section in sections:
+            if section == 'microbatch':
+                self.bench_microbatch(options['clients'])
+            elif section == 'cache':
+                self.bench_cache(max(options['rows']))
+            elif section == 'load':
+                self.bench_load(options['load_runs'])
+            else:
+                getattr(self, f'bench_{section}')(options['rows'])
+            self.stdout.write("")
+
+    def bench_encoder(self, row_counts):
+        self.stdout.write(f"{'rows':>8} {'get_dummies rows/s':>20} {'encoder rows/s':>16} {'speedup':>8}")
+        for n_rows in row_counts:
+            df = make_sample_frame(n_rows)
+            legacy = time_call(lambda: predictor.preprocess_for_prediction(df))
+            encoder = time_call(lambda: predictor.encoder.transform(df))
+            self.stdout.write(
+                f"{n_rows:>8} {n_rows / legacy:>20,.0f} {n_rows / encoder:>16,.0f} {legacy / encoder:>7.1f}x"
+            )
+
+    def bench_inference(self, row_counts):
+        """Scoring latency of each artifact format, all through LoadedModel.predict_probabilities"""
+        with tempfile.TemporaryDirectory() as tmp:
+            models = [(label, getattr(LoadedModel, loader)(path)) for label, loader, path in self.artifacts(tmp)]
+
+        header = ''.join(f"{f'{label} ms':>14}" for label, _ in models)
+        self.stdout.write(f"{'rows':>8}{header} {'max |dp|':>10}")
+        for n_rows in row_counts:
+            df = make_sample_frame(n_rows)
+            timings, probabilities = [], []
+            for _, model in models:
+                X = model.encoder.transform(df)
+                probabilities.append(model.predict_probabilities(X))
+                timings.append(time_call(lambda: model.predict_probabilities(X)))
+            error = max(np.abs(p - probabilities[0]).max() for p in probabilities)
+            self.stdout.write(f"{n_rows:>8}{''.join(f'{t * 1000:>14.3f}' for t in timings)} {error:>10.1e}")
+
+    def bench_compiled(self, row_counts):
+        compiled = CompiledTreeModel.from_booster(predictor.booster, predictor.iteration_range)
+        self.stdout.write(f"{'rows':>8} {'inplace_predict ms':>20} {'compiled numpy ms':>19} {'max |dp|':>10}")
+        for n_rows in row_counts:
+            X = predictor.encoder.transform(make_sample_frame(n_rows))
+            expected = predictor.booster.inplace_predict(X, iteration_range=predictor.iteration_range)
+            error = np.abs(compiled.inplace_predict(X) - expected).max()
+            native = time_call(lambda: predictor.booster.inplace_predict(X, iteration_range=predictor.iteration_range))
+            numpy_trees = time_call(lambda: compiled.inplace_predict(X))
+            self.stdout.write(f"{n_rows:>8} {native * 1000:>20.3f} {numpy_trees * 1000:>19.3f} {error:>10.1e}")
+
+    def bench_microbatch(self, clients, requests=2000):
+        employees = make_sample_frame(requests).to_dict('records')
+        batch_size = predictor.batcher.max_batch_size
+
+        def run(max_batch_size):
+            predictor.batcher.max_batch_size = max_batch_size
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=clients) as pool:
+                list(pool.map(predictor.predict_single_employee, employees))
+            return time.perf_counter() - start
+
+        # Measure model calls, not cache hits from the first run
+        cache_size = predictor.cache.max_size
+        predictor.cache.max_size = 0
+        try:
+            unbatched = run(1)
+            batched = run(batch_size)
+        finally:
+            predictor.batcher.max_batch_size = batch_size
+            predictor.cache.max_size = cache_size
+
+        self.stdout.write(f"{requests} feedback predictions from {clients} concurrent clients")
+        self.stdout.write(f"  one model call each: {requests / unbatched:>10,.0f} req/s")
+        self.stdout.write(f"  micro-batched:       {requests / batched:>10,.0f} req/s  {predictor.batcher.stats()}")
+
+    def bench_cache(self, n_rows):
+        X = predictor.encoder.transform(make_sample_frame(n_rows))
+        predictor.cache.reset(predictor.model_version)
+
+        start = time.perf_counter()
+        predictor.score_features(X)
+        cold = time.perf_counter() - start
+        warm = time_call(lambda: predictor.score_features(X))
+        uncached = time_call(lambda: predictor.predict_probabilities(X))
+
+        self.stdout.write(f"{n_rows} rows: no cache {uncached * 1000:.1f} ms | cold cache {cold * 1000:.1f} ms | "
+                          f"warm cache (re-upload) {warm * 1000:.1f} ms")
+        self.stdout.write(f"  {predictor.cache.stats()}")
+
+    def bench_load(self, runs):
+        """Cold load time and resident memory of the pickle vs the native bundle vs compiled trees"""
+        with tempfile.TemporaryDirectory() as tmp:
+            self.stdout.write(f"{'artifact':<10} {'cold ms':>9} {'reload ms':>10} {'RSS +MB':>9}")
+            for label, loader, path in self.artifacts(tmp):
+                probes = [self.probe_load(loader, path) for _ in range(runs)]
+                best = min(probes, key=lambda probe: probe['cold'])
+                reload = min(probe['reload'] for probe in probes)
+                self.stdout.write(
+                    f"{label:<10} {best['cold'] * 1000:>9.1f} {reload * 1000:>10.1f} "
+                    f"{best['rss_mb']:>9.1f}"
+                )
+
+    def artifacts(self, tmp):
+        """(label, LoadedModel factory, path) per artifact format; missing ones are exported into tmp"""
+        native_path = NATIVE_MODEL_PATH
+        if not os.path.isdir(native_path):
+            native_path = os.path.join(tmp, 'attrition_model')
+            predictor.export_native_model(native_path)
+        compiled_path = os.path.join(tmp, 'attrition_model.npz')
+        predictor.export_compiled_model(compiled_path)
+
+        artifacts = [('native', 'from_native', native_path), ('compiled', 'from_compiled', compiled_path)]
+        if os.path.exists(PICKLED_MODEL_PATH):
+            artifacts.insert(0, ('pickle', 'from_pickle', PICKLED_MODEL_PATH))
+        return artifacts
+
+    def probe_load(self, loader, path):
+        result = subprocess.run(
+            [sys.executable, '-c', LOAD_PROBE, loader, str(path)],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            env={**os.environ, 'PYTHONWARNINGS': 'ignore'},
+        )
+        return json.loads(result.stdout.strip().splitlines()[-1])
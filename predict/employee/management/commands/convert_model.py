@@ -0,0 +1,47 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from employee.ml_utils import NATIVE_MODEL_PATH, PICKLED_MODEL_PATH, AttritionPredictor, LoadedModel
+from employee.management.commands.benchmark_model import make_sample_frame
+from employee.model_registry import artifact_files
+
+
+class Command(BaseCommand):
+    help = ("Convert a pickled attrition model into a native bundle: XGBoost UBJSON booster plus JSON/.npy "
+            "sidecar (ATTRITION_MODEL_BACKEND = 'native', or publish the directory to the model registry)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', nargs='?', default=PICKLED_MODEL_PATH, help="Pickled model (.pkl)")
+        parser.add_argument('--output', default=NATIVE_MODEL_PATH, help="Bundle directory to write")
+        parser.add_argument('--tolerance', type=float, default=1e-6,
+                            help="Maximum allowed probability difference against the pickled model")
+
+    def handle(self, *args, **options):
+        predictor = AttritionPredictor(backend='xgboost')
+        try:
+            predictor.load_pickled_model(options['input'])
+        except Exception as e:
+            raise CommandError(f"Could not load {options['input']}: {e}")
+
+        predictor.export_native_model(options['output'])
+
+        # Refuse to leave behind a bundle that encodes or scores differently
+        start = time.perf_counter()
+        native = LoadedModel.from_native(options['output'])
+        load_ms = (time.perf_counter() - start) * 1000
+
+        df = make_sample_frame(5000)
+        X = predictor.encoder.transform(df)
+        if not np.array_equal(native.encoder.transform(df), X):
+            raise CommandError("Bundle encodes features differently from the pickled model")
+        max_error = float(np.abs(native.predict_probabilities(X) - predictor.predict_probabilities(X)).max())
+        if max_error > options['tolerance']:
+            raise CommandError(f"Bundle differs from the pickled model by {max_error:.2e}")
+
+        size = sum(file.stat().st_size for _, file in artifact_files(options['output']))
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {options['output']} ({size / 1024:.0f} KiB, version {native.version}); "
+            f"loads in {load_ms:.0f} ms, max |Δp| vs pickle: {max_error:.2e}"
+        ))
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from employee.ml_utils import AttritionPredictor
+from employee.model_registry import ModelRegistry, RegistryError
+
+
+class Command(BaseCommand):
+    help = ("Publish, activate and list versioned attrition model artifacts. Web workers hot-swap "
+            "the activated version within ATTRITION_MODEL_RELOAD_INTERVAL seconds.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--registry', help="Registry directory (default: settings.ATTRITION_MODEL_REGISTRY)")
+        actions = parser.add_subparsers(dest='action', required=True)
+
+        publish = actions.add_parser('publish', help="Copy an artifact into the registry as a new version")
+        publish.add_argument('artifact', help="Pickled model (.pkl), compiled trees (.npz) or native bundle directory")
+        publish.add_argument('--backend', choices=['xgboost', 'native', 'compiled'], help="Default: from the file suffix")
+        publish.add_argument('--notes', default='', help="Free text stored in the manifest")
+        publish.add_argument('--no-activate', action='store_true', help="Publish without switching CURRENT")
+
+        activate = actions.add_parser('activate', help="Point CURRENT at a published version (or roll back)")
+        activate.add_argument('version')
+
+        actions.add_parser('list', help="Show published versions")
+
+    def handle(self, *args, **options):
+        registry = ModelRegistry(options['registry'])
+        try:
+            getattr(self, f"handle_{options['action']}")(registry, options)
+        except RegistryError as e:
+            raise CommandError(str(e))
+
+    def handle_publish(self, registry, options):
+        manifest = registry.publish(options['artifact'], backend=options['backend'], notes=options['notes'],
+                                    activate=False)
+        # Refuse to register an artifact that can't be loaded and scored, so it can't be activated later
+        predictor = AttritionPredictor(registry=registry)
+        try:
+            predictor.warm_model(predictor.load_version(manifest))
+        except Exception as e:
+            registry.remove(manifest['version'])
+            raise CommandError(f"{options['artifact']} does not load, nothing published: {e}")
+
+        if not options['no_activate']:
+            registry.activate(manifest['version'])
+        state = 'published' if options['no_activate'] else 'published and activated'
+        self.stdout.write(self.style.SUCCESS(f"Version {manifest['version']} {state}"))
+
+    def handle_activate(self, registry, options):
+        manifest = registry.activate(options['version'])
+        self.stdout.write(self.style.SUCCESS(f"Version {manifest['version']} activated"))
+
+    def handle_list(self, registry, options):
+        current = registry.current_version()
+        for manifest in registry.versions():
+            marker = '*' if manifest['version'] == current else ' '
+            self.stdout.write(
+                f"{marker} {manifest['version']}  {manifest['backend']:<8}  {manifest['artifact']}  {manifest['notes']}"
+            )
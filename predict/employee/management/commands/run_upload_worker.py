@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from employee.jobs import run_worker
+
+
+class Command(BaseCommand):
+    help = "Process queued CSV uploads, using the database as the job queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help="Seconds to wait between polls when the queue is empty")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the pending jobs and exit instead of polling forever")
+
+    def handle(self, *args, **options):
+        self.stdout.write("Upload worker started")
+        run_worker(poll_interval=options['interval'], once=options['once'])
@@ -13,6 +13,12 @@ class Migration(migrations.Migration):
         ('employee', '0002_alter_employeeattrition_education_and_more'),
     ]
 
+    # admin's initial migration has a FK to AUTH_USER_MODEL (President), which
+    # only exists from here on; without this a fresh (test) database can't migrate.
+    run_before = [
+        ('admin', '0001_initial'),
+    ]
+
     operations = [
         migrations.AddField(
             model_name='employeeattrition',
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:14
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0005_alter_employeeattrition_created_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='uploads/')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('rows_parsed', models.PositiveIntegerField(default=0)),
+                ('rows_scored', models.PositiveIntegerField(default=0)),
+                ('rows_persisted', models.PositiveIntegerField(default=0)),
+                ('created_count', models.PositiveIntegerField(default=0)),
+                ('updated_count', models.PositiveIntegerField(default=0)),
+                ('retained_count', models.PositiveIntegerField(default=0)),
+                ('low_risk_count', models.PositiveIntegerField(default=0)),
+                ('medium_risk_count', models.PositiveIntegerField(default=0)),
+                ('high_risk_count', models.PositiveIntegerField(default=0)),
+                ('preview_ids', models.JSONField(blank=True, default=list, help_text='First uploaded employee IDs, shown on the results table')),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Upload Job',
+                'verbose_name_plural': 'Upload Jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
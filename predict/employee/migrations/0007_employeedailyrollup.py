@@ -0,0 +1,91 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:33
+
+from bisect import bisect_right
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# Frozen copy of the employee.rollups bucketing as of this migration, so
+# replaying it never depends on later versions of the app code
+AGE_BAND_EDGES = [22, 31, 41, 51, 61]
+TENURE_BAND_EDGES = [3, 6, 11, 16]
+RISK_BUCKET_WIDTH = 5
+RISK_BUCKETS = 100 // RISK_BUCKET_WIDTH
+SALARY_BAND_WIDTH = 10000
+
+
+def rollup_dimensions(employee, tz):
+    probability = employee['attrition_probability']
+    if probability is not None:
+        probability = min(max(int(probability // RISK_BUCKET_WIDTH), 0), RISK_BUCKETS - 1)
+
+    return {
+        'day': timezone.localtime(employee['created_at'], tz).date(),
+        'data_source': employee['data_source'],
+        'gender': employee['gender'],
+        'risk_bucket': probability,
+        'job_satisfaction': employee['job_satisfaction'],
+        'age_band': bisect_right(AGE_BAND_EDGES, employee['age']),
+        'tenure_band': bisect_right(TENURE_BAND_EDGES, employee['years_at_company']),
+        'salary_band': employee['current_salary'] // SALARY_BAND_WIDTH,
+    }
+
+
+def build_rollup(apps, schema_editor):
+    EmployeeAttrition = apps.get_model('employee', 'EmployeeAttrition')
+    EmployeeDailyRollup = apps.get_model('employee', 'EmployeeDailyRollup')
+    tz = timezone.get_default_timezone()
+
+    totals = defaultdict(lambda: [0, 0, 0.0])
+    employees = EmployeeAttrition.objects.order_by().values(
+        'created_at', 'data_source', 'gender', 'attrition_probability', 'is_retained',
+        'job_satisfaction', 'age', 'years_at_company', 'current_salary',
+    )
+    for employee in employees.iterator(chunk_size=2000):
+        total = totals[tuple(rollup_dimensions(employee, tz).items())]
+        total[0] += 1
+        total[1] += 1 if employee['is_retained'] else 0
+        total[2] += employee['attrition_probability'] or 0
+
+    EmployeeDailyRollup.objects.bulk_create([
+        EmployeeDailyRollup(
+            key='|'.join(str(value) for _, value in dimensions),
+            count=count, retained_count=retained, probability_sum=probability_sum,
+            **dict(dimensions),
+        )
+        for dimensions, (count, retained, probability_sum) in totals.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0006_uploadjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=120, unique=True)),
+                ('day', models.DateField(db_index=True)),
+                ('data_source', models.CharField(max_length=20)),
+                ('gender', models.CharField(max_length=6)),
+                ('risk_bucket', models.PositiveSmallIntegerField(help_text='attrition_probability // 5, null when unscored', null=True)),
+                ('job_satisfaction', models.PositiveSmallIntegerField()),
+                ('age_band', models.PositiveSmallIntegerField()),
+                ('tenure_band', models.PositiveSmallIntegerField()),
+                ('salary_band', models.PositiveIntegerField(help_text='current_salary // 10000')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('retained_count', models.PositiveIntegerField(default=0)),
+                ('probability_sum', models.FloatField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Employee Daily Rollup',
+                'verbose_name_plural': 'Employee Daily Rollups',
+            },
+        ),
+        migrations.RunPython(build_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0007_employeedailyrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employeeattrition',
+            index=models.Index(fields=['created_at', 'id'], name='employee_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeeattrition',
+            index=models.Index(fields=['is_retained', 'attrition_probability'], name='employee_retained_prob_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeeattrition',
+            index=models.Index(condition=models.Q(('is_retained', False)), fields=['-attrition_probability'], name='employee_attrition_prob_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeeattrition',
+            index=models.Index(condition=models.Q(('is_retained', True)), fields=['attrition_probability'], name='employee_retention_prob_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeeattrition',
+            index=models.Index(fields=['created_at', 'attrition_probability'], name='employee_created_prob_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='uploadjob',
+            index=models.Index(fields=['status', 'created_at'], name='uploadjob_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+# Backend-specific search index for the reports name / ID search (see employee/search.py).
+# Names are frozen here rather than imported, so replaying the migration never depends on later app code.
+
+FTS_TABLE = 'employee_search'
+
+POSTGRES_INDEXES = [
+    ('employee_name_trgm_idx', 'name'),
+    ('employee_id_trgm_idx', 'employee_id'),
+    ('employee_name_upper_trgm_idx', 'UPPER(name::text)'),
+    ('employee_id_upper_trgm_idx', 'UPPER(employee_id::text)'),
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(employee_id, name, tokenize='trigram')"
+            )
+        except OperationalError:
+            # SQLite without FTS5 / the trigram tokenizer (< 3.34): search falls back to LIKE
+            return
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, employee_id, name) SELECT id, employee_id, name FROM employee_employeeattrition'
+        )
+
+    elif vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for name, expression in POSTGRES_INDEXES:
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {name} ON employee_employeeattrition USING gin ({expression} gin_trgm_ops)'
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    elif vendor == 'postgresql':
+        for name, _ in POSTGRES_INDEXES:
+            schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0008_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0010_dataversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employeeattrition',
+            name='risk_contributions',
+            field=models.BinaryField(blank=True, help_text='Per-feature contributions to the risk score, TreeSHAP or Saabas per ATTRITION_CONTRIBUTIONS (float16, see ml_utils.SOURCE_FEATURES)', null=True),
+        ),
+    ]
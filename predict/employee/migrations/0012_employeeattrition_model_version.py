@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0011_employeeattrition_risk_contributions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employeeattrition',
+            name='model_version',
+            field=models.CharField(blank=True, default='', help_text='Model version that produced attrition_probability (empty for the random fallback)', max_length=64),
+        ),
+    ]
@@ -0,0 +1,171 @@
+# model_registry.py
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+
+REGISTRY_DIR = Path(getattr(settings, 'ATTRITION_MODEL_REGISTRY', settings.BASE_DIR / 'models' / 'registry'))
+
+MANIFEST_FILE = 'manifest.json'
+CURRENT_FILE = 'CURRENT'
+
+# Artifact suffix -> AttritionPredictor backend; a directory is a native bundle (`manage.py convert_model`)
+BACKENDS = {'.pkl': 'xgboost', '.npz': 'compiled'}
+DIRECTORY_BACKEND = 'native'
+
+
+class RegistryError(Exception):
+    pass
+
+
+def artifact_files(path):
+    """(name, path) of each file in an artifact: the file itself, or a directory's files in name order"""
+    path = Path(path)
+    if not path.is_dir():
+        return [(path.name, path)]
+    return sorted((file.relative_to(path).as_posix(), file) for file in path.rglob('*') if file.is_file())
+
+
+def sha256_digest(path):
+    """Content hash of a file, or of a directory's file names and contents"""
+    digest = hashlib.sha256()
+    is_dir = Path(path).is_dir()
+    for name, file in artifact_files(path):
+        if is_dir:
+            digest.update(name.encode() + b'\0')
+        with open(file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_atomic(path, text):
+    """Replace `path` with `text` in one rename, so readers see the old or the new content, never a mix"""
+    partial = path.with_name(f'.{path.name}.{os.getpid()}.part')
+    partial.write_text(text)
+    os.replace(partial, path)
+
+
+class ModelRegistry:
+    """
+    Directory of versioned model artifacts:
+
+        <root>/versions/<version>/manifest.json
+        <root>/versions/<version>/<artifact>
+        <root>/CURRENT              name of the active version
+
+    Versions are immutable once published; `CURRENT` is swapped with a
+    rename, and workers poll its stat() to pick up a new version.
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root or REGISTRY_DIR)
+        self.versions_dir = self.root / 'versions'
+        self.current_file = self.root / CURRENT_FILE
+
+    def manifest(self, version):
+        try:
+            return json.loads((self.versions_dir / version / MANIFEST_FILE).read_text())
+        except (OSError, ValueError) as e:
+            raise RegistryError(f"Unknown model version {version!r}") from e
+
+    def versions(self):
+        """Manifests of every published version, oldest first"""
+        if not self.versions_dir.is_dir():
+            return []
+        manifests = [
+            json.loads(path.read_text()) for path in self.versions_dir.glob(f'*/{MANIFEST_FILE}')
+            if not path.parent.name.startswith('.')  # unfinished publish
+        ]
+        return sorted(manifests, key=lambda manifest: manifest['created_at'])
+
+    def current_version(self):
+        try:
+            return self.current_file.read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def current(self):
+        """Manifest of the active version, or None for an empty registry"""
+        version = self.current_version()
+        return self.manifest(version) if version else None
+
+    def current_stamp(self):
+        """Cheap change marker for the CURRENT pointer (inode and mtime change on every activate)"""
+        try:
+            stat = self.current_file.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def artifact_path(self, manifest):
+        return self.versions_dir / manifest['version'] / manifest['artifact']
+
+    def publish(self, artifact, backend=None, notes='', activate=True):
+        """Copy an artifact into the registry as a new version; returns its manifest"""
+        artifact = Path(artifact)
+        backend = backend or (DIRECTORY_BACKEND if artifact.is_dir() else BACKENDS.get(artifact.suffix))
+        if backend is None:
+            raise RegistryError(f"Can't tell the backend of {artifact.name}; pass it explicitly")
+
+        digest = sha256_digest(artifact)
+        created_at = datetime.now(timezone.utc)
+        version = f"{created_at:%Y%m%d%H%M%S}-{digest[:12]}"
+        manifest = {
+            'version': version,
+            'backend': backend,
+            'artifact': artifact.name,
+            'sha256': digest,
+            'size': sum(file.stat().st_size for _, file in artifact_files(artifact)),
+            'created_at': created_at.isoformat(),
+            'source': str(artifact),
+            'notes': notes,
+        }
+
+        if (self.versions_dir / version).exists():
+            raise RegistryError(f"Version {version} is already published")
+
+        # Assemble in a hidden directory, then rename it into place
+        self.versions_dir.mkdir(parents=True, exist_ok=True)
+        staging = self.versions_dir / f'.{version}.{os.getpid()}.part'
+        staging.mkdir()
+        try:
+            if artifact.is_dir():
+                shutil.copytree(artifact, staging / artifact.name)
+            else:
+                shutil.copyfile(artifact, staging / artifact.name)
+            (staging / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+            os.rename(staging, self.versions_dir / version)
+        finally:
+            if staging.exists():
+                shutil.rmtree(staging)
+
+        if activate:
+            self.activate(version)
+        return manifest
+
+    def remove(self, version):
+        """Delete a published version; the active one can't be removed"""
+        manifest = self.manifest(version)
+        if version == self.current_version():
+            raise RegistryError(f"Version {version} is active; activate another version first")
+        # Hide it from versions() first, so no reader sees a half-deleted directory
+        removing = self.versions_dir / f'.{version}.{os.getpid()}.removed'
+        os.rename(self.versions_dir / version, removing)
+        shutil.rmtree(removing)
+        return manifest
+
+    def activate(self, version):
+        """Point CURRENT at a published version"""
+        manifest = self.manifest(version)
+        if sha256_digest(self.artifact_path(manifest)) != manifest['sha256']:
+            raise RegistryError(f"Artifact of {version} does not match its manifest checksum")
+        _write_atomic(self.current_file, version + '\n')
+        return manifest
+
+
+registry = ModelRegistry()
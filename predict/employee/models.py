@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
 from django.contrib.auth.models import AbstractUser, Group, Permission
 from django.utils import timezone
 
@@ -89,6 +90,18 @@ class EmployeeAttrition(models.Model):
         default=False,
         help_text="Automatically set to True if attrition risk < 25%"
     )
+    model_version = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        help_text="Model version that produced attrition_probability (empty for the random fallback)"
+    )
+    risk_contributions = models.BinaryField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Per-feature contributions to the risk score, TreeSHAP or Saabas per ATTRITION_CONTRIBUTIONS (float16, see ml_utils.SOURCE_FEATURES)"
+    )
 
     DATA_SOURCE_CHOICES = [
         ('Feedback Form', 'Feedback Form'),
@@ -106,7 +119,124 @@ class EmployeeAttrition(models.Model):
     def __str__(self):
         return f"{self.employee_id} - {self.name} - {self.marital_status}"
 
+    def save(self, *args, **kwargs):
+        # The post_save handlers (rollup, search index, data version) commit or roll back with the row
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+    @property
+    def top_drivers(self):
+        """Features raising this employee's risk the most, from the contributions stored at scoring time"""
+        from .ml_utils import top_drivers
+        return top_drivers(self.risk_contributions)
+
     class Meta:
         verbose_name = "Employee Attrition"
         verbose_name_plural = "Employee Attritions"
         ordering = ['-created_at']  # Show newest first
+        indexes = [
+            # Reports table: keyset pagination on (created_at, id)
+            models.Index(fields=['created_at', 'id'], name='employee_created_id_idx'),
+            # Covers the headline stats aggregate (reports, dashboard)
+            models.Index(fields=['is_retained', 'attrition_probability'], name='employee_retained_prob_idx'),
+            # CSV downloads; partial because `WHERE [NOT] is_retained` can't seek the composite index
+            models.Index(fields=['-attrition_probability'], condition=Q(is_retained=False),
+                         name='employee_attrition_prob_idx'),
+            models.Index(fields=['attrition_probability'], condition=Q(is_retained=True),
+                         name='employee_retention_prob_idx'),
+            # Trend: created_at range counting risk >= 50% without touching the table
+            models.Index(fields=['created_at', 'attrition_probability'], name='employee_created_prob_idx'),
+        ]
+
+
+# Queued CSV upload, scored in the background by the upload worker
+class UploadJob(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    file = models.FileField(upload_to='uploads/')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+
+    # Progress counters, polled by prediction.html
+    rows_parsed = models.PositiveIntegerField(default=0)
+    rows_scored = models.PositiveIntegerField(default=0)
+    rows_persisted = models.PositiveIntegerField(default=0)
+
+    # Result summary
+    created_count = models.PositiveIntegerField(default=0)
+    updated_count = models.PositiveIntegerField(default=0)
+    retained_count = models.PositiveIntegerField(default=0)
+    low_risk_count = models.PositiveIntegerField(default=0)
+    medium_risk_count = models.PositiveIntegerField(default=0)
+    high_risk_count = models.PositiveIntegerField(default=0)
+    preview_ids = models.JSONField(default=list, blank=True, help_text="First uploaded employee IDs, shown on the results table")
+
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Touched on every progress save; a running job that stops beating is requeued (see jobs.py)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Upload #{self.pk} - {self.status}"
+
+    class Meta:
+        verbose_name = "Upload Job"
+        verbose_name_plural = "Upload Jobs"
+        ordering = ['-created_at']
+        indexes = [
+            # Worker polling: oldest pending job
+            models.Index(fields=['status', 'created_at'], name='uploadjob_status_created_idx'),
+        ]
+
+
+# Per-day employee counts for every combination of the analytics dimensions,
+# kept up to date by employee.rollups so analytics never scans EmployeeAttrition
+class EmployeeDailyRollup(models.Model):
+    # '|'-joined dimension values, for exact lookups when applying deltas
+    key = models.CharField(max_length=120, unique=True)
+
+    day = models.DateField(db_index=True)
+    data_source = models.CharField(max_length=20)
+    gender = models.CharField(max_length=6)
+    risk_bucket = models.PositiveSmallIntegerField(null=True, help_text="attrition_probability // 5, null when unscored")
+    job_satisfaction = models.PositiveSmallIntegerField()
+    age_band = models.PositiveSmallIntegerField()
+    tenure_band = models.PositiveSmallIntegerField()
+    salary_band = models.PositiveIntegerField(help_text="current_salary // 10000")
+
+    count = models.PositiveIntegerField(default=0)
+    retained_count = models.PositiveIntegerField(default=0)
+    probability_sum = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"{self.day} - {self.key} - {self.count}"
+
+    class Meta:
+        verbose_name = "Employee Daily Rollup"
+        verbose_name_plural = "Employee Daily Rollups"
+
+
+# Change counter for a data set, bumped on every write; export snapshots and
+# cached analytics are keyed on it
+class DataVersion(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+    class Meta:
+        verbose_name = "Data Version"
+        verbose_name_plural = "Data Versions"
@@ -0,0 +1,118 @@
+# pagination.py
+import base64
+import binascii
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = getattr(settings, 'EMPLOYEE_REPORTS_PAGE_SIZE', 50)
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(employee):
+    """Opaque cursor for the (created_at, id) position of an employee"""
+    raw = f"{employee.created_at.isoformat()}|{employee.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(created_at, id) from encode_cursor(), or None if the cursor is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+
+
+def encode_rank_cursor(offset):
+    """Opaque cursor for a position in a ranked list (search results)"""
+    return base64.urlsafe_b64encode(f"rank|{offset}".encode()).decode().rstrip('=')
+
+
+def decode_rank_cursor(cursor):
+    """Offset from encode_rank_cursor(), or None if the cursor is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        kind, offset = raw.split('|')
+        return int(offset) if kind == 'rank' and int(offset) >= 0 else None
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    """One page of employees, newest first, plus cursors for the neighbouring pages"""
+
+    def __init__(self, items, next_cursor=None, previous_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def keyset_page(queryset, after=None, before=None, page_size=None):
+    """
+    Page through `queryset` ordered by (-created_at, -id).
+
+    `after` continues past the last row of a page (older rows), `before`
+    goes back to the rows preceding the first one (newer rows). Each page is
+    a single indexed range scan with LIMIT page_size + 1, so it costs the
+    same at any depth, unlike OFFSET.
+    """
+    page_size = page_size or DEFAULT_PAGE_SIZE
+    position = decode_cursor(before or after or '')
+    backwards = position is not None and bool(before)
+
+    if position is not None:
+        created_at, pk = position
+        if backwards:
+            queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+        else:
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    ordering = ('created_at', 'id') if backwards else ('-created_at', '-id')
+    rows = list(queryset.order_by(*ordering)[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+
+    if not rows:
+        return KeysetPage(rows)
+
+    # Going back, there is always a next page (the one we came from); going forward, a previous one
+    has_next = has_more if not backwards else True
+    has_previous = has_more if backwards else position is not None
+    return KeysetPage(
+        rows,
+        next_cursor=encode_cursor(rows[-1]) if has_next else None,
+        previous_cursor=encode_cursor(rows[0]) if has_previous else None,
+    )
+
+
+def ranked_page(queryset, ranked_ids, after=None, before=None, page_size=None):
+    """
+    One page of `queryset` in the order of `ranked_ids` (search results,
+    best first). The cursors are rank offsets: `after` starts at the next
+    page, `before` returns to the page preceding the one it came from.
+    """
+    page_size = page_size or DEFAULT_PAGE_SIZE
+    end = decode_rank_cursor(before or '')
+    if end is not None:
+        start = max(end - page_size, 0)
+    else:
+        start = min(decode_rank_cursor(after or '') or 0, len(ranked_ids))
+
+    ids = ranked_ids[start:start + page_size]
+    shown = queryset.in_bulk(ids)
+    return KeysetPage(
+        [shown[pk] for pk in ids if pk in shown],
+        next_cursor=encode_rank_cursor(start + page_size) if start + page_size < len(ranked_ids) else None,
+        previous_cursor=encode_rank_cursor(start) if start > 0 else None,
+    )
@@ -0,0 +1,88 @@
+# prediction_cache.py
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def row_keys(X):
+    """One bytes key per row of an encoded feature matrix (exact, no hashing collisions)"""
+    X = np.ascontiguousarray(X)
+    return X.view(np.dtype((np.void, X.dtype.itemsize * X.shape[1]))).ravel()
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of model probabilities keyed by encoded feature rows.
+
+    The encoded row covers all 13 model inputs; the cache is tied to one
+    model version and is emptied by reset() whenever a model is (re)loaded.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def reset(self, version):
+        with self._lock:
+            self.version = version
+            self.hits = 0
+            self.misses = 0
+            self._data.clear()
+
+    def predict(self, X, predict_fn, version=None):
+        """
+        Probabilities for every row of X, calling predict_fn only on rows not
+        cached yet. Duplicate rows within X are scored once. A `version` other
+        than the cache's (a model being swapped out) bypasses the cache.
+        """
+        if not self.max_size or len(X) == 0 or (version is not None and version != self.version):
+            return predict_fn(X)
+
+        unique_keys, first_row, inverse = np.unique(row_keys(X), return_index=True, return_inverse=True)
+        keys = unique_keys.tolist()
+
+        with self._lock:
+            cached = list(map(self._data.get, keys))
+            for key, value in zip(keys, cached):
+                if value is not None:
+                    self._data.move_to_end(key)
+
+        missing = [i for i, value in enumerate(cached) if value is None]
+        probabilities = np.array([np.nan if value is None else value for value in cached], dtype=np.float32)
+
+        if missing:
+            missing = np.array(missing, dtype=np.intp)
+            fresh = np.asarray(predict_fn(X[first_row[missing]]), dtype=np.float32)
+            probabilities[missing] = fresh
+            self._store([keys[i] for i in missing], fresh.tolist(), version)
+
+        with self._lock:
+            self.hits += len(X) - len(missing)
+            self.misses += len(missing)
+
+        return probabilities[inverse.ravel()]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'version': self.version,
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0,
+            }
+
+    def _store(self, keys, values, version=None):
+        with self._lock:
+            if version is not None and version != self.version:
+                return  # reset() for a new model ran while these were computed
+            self._data.update(zip(keys, values))
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
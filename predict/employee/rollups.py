@@ -0,0 +1,302 @@
+# rollups.py
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import EmployeeAttrition, EmployeeDailyRollup
+
+# EmployeeAttrition fields a rollup row is derived from
+SOURCE_FIELDS = ['created_at', 'data_source', 'gender', 'attrition_probability', 'is_retained',
+                 'job_satisfaction', 'age', 'years_at_company', 'current_salary']
+
+DIMENSIONS = ['day', 'data_source', 'gender', 'risk_bucket', 'job_satisfaction',
+              'age_band', 'tenure_band', 'salary_band']
+METRICS = ['count', 'retained_count', 'probability_sum']
+
+RISK_BUCKET_WIDTH = 5
+RISK_BUCKETS = 100 // RISK_BUCKET_WIDTH
+SALARY_BAND_WIDTH = 10000
+
+# Band = number of edges <= value, so age band 0 is "under 22" and is not charted
+AGE_BAND_EDGES = [22, 31, 41, 51, 61]
+AGE_BAND_LABELS = ['22-30', '31-40', '41-50', '51-60', '60+']
+TENURE_BAND_EDGES = [3, 6, 11, 16]
+TENURE_BAND_LABELS = ['0-2 years', '3-5 years', '6-10 years', '11-15 years', '15+ years']
+SATISFACTION_LABELS = ['Very Low', 'Low', 'Medium', 'High', 'Very High']
+
+
+def source_row(employee):
+    """The rollup source fields of an EmployeeAttrition instance, as a dict"""
+    return {field: getattr(employee, field) for field in SOURCE_FIELDS}
+
+
+def rollup_dimensions(row, tz):
+    """Dimension tuple (in DIMENSIONS order) an employee row is counted under"""
+    probability = row['attrition_probability']
+    if probability is not None:
+        probability = min(max(int(probability // RISK_BUCKET_WIDTH), 0), RISK_BUCKETS - 1)
+
+    return (
+        timezone.localtime(row['created_at'], tz).date(),
+        row['data_source'],
+        row['gender'],
+        probability,
+        row['job_satisfaction'],
+        bisect_right(AGE_BAND_EDGES, row['age']),
+        bisect_right(TENURE_BAND_EDGES, row['years_at_company']),
+        row['current_salary'] // SALARY_BAND_WIDTH,
+    )
+
+
+def is_at_risk(row):
+    """Rollup row whose employees have attrition_probability >= 50"""
+    return row['risk_bucket'] is not None and row['risk_bucket'] * RISK_BUCKET_WIDTH >= 50
+
+
+def rollup_key(dimensions):
+    return '|'.join(str(value) for value in dimensions)
+
+
+def accumulate(rows, sign=1, totals=None):
+    """Add (or with sign=-1 subtract) employee rows into {dimensions: [count, retained, probability_sum]}"""
+    totals = totals if totals is not None else defaultdict(lambda: [0, 0, 0.0])
+    tz = timezone.get_default_timezone()
+
+    for row in rows:
+        total = totals[rollup_dimensions(row, tz)]
+        total[0] += sign
+        total[1] += sign if row['is_retained'] else 0
+        total[2] += sign * (row['attrition_probability'] or 0)
+
+    return totals
+
+
+def apply_rollup_changes(added=(), removed=()):
+    """
+    Move employee rows (dicts of SOURCE_FIELDS) in and out of the rollup.
+
+    Deltas are summed per dimension tuple first, so a bulk upload touches
+    each rollup row once. Each delta is applied as an `UPDATE ... SET
+    count = count + n` so concurrent writers never overwrite each other's
+    counts; call this inside the transaction that writes the employees.
+    """
+    totals = accumulate(removed, sign=-1, totals=accumulate(added))
+    deltas = {rollup_key(dimensions): (dimensions, delta) for dimensions, delta in totals.items() if any(delta)}
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        _apply_deltas(deltas)
+
+
+def _increment(key, count, retained, probability_sum):
+    """Add a delta to an existing rollup row in SQL; returns the number of rows updated (0 or 1)"""
+    return EmployeeDailyRollup.objects.filter(key=key).update(
+        count=Greatest(F('count') + count, 0),
+        retained_count=Greatest(F('retained_count') + retained, 0),
+        probability_sum=F('probability_sum') + probability_sum,
+    )
+
+
+def _apply_deltas(deltas):
+    missing = [key for key, (_, delta) in deltas.items() if not _increment(key, *delta)]
+    new_rows = [
+        EmployeeDailyRollup(key=key, **dict(zip(DIMENSIONS, deltas[key][0])), **dict(zip(METRICS, deltas[key][1])))
+        for key in missing
+        if deltas[key][1][0] > 0  # removing rows the rollup never saw; rebuild_rollups() fixes such drift
+    ]
+
+    if new_rows:
+        try:
+            with transaction.atomic():
+                EmployeeDailyRollup.objects.bulk_create(new_rows, batch_size=500)
+        except IntegrityError:
+            # A concurrent writer created some of these keys first; add to theirs instead
+            for rollup in new_rows:
+                try:
+                    with transaction.atomic():
+                        rollup.save(force_insert=True)
+                except IntegrityError:
+                    _increment(rollup.key, rollup.count, rollup.retained_count, rollup.probability_sum)
+
+    shrunk = [key for key, (_, delta) in deltas.items() if delta[0] < 0]
+    if shrunk:
+        EmployeeDailyRollup.objects.filter(key__in=shrunk, count=0).delete()
+
+
+def rebuild_rollups(chunk_size=2000):
+    """
+    Recompute the whole rollup table from EmployeeAttrition; returns the number of rollup rows.
+
+    The read and the swap share one transaction, which on SQLite
+    (transaction_mode IMMEDIATE) holds the write lock throughout, so no
+    employee write can land between them and be lost. On other backends
+    run it with upload workers and the feedback form stopped.
+    """
+    with transaction.atomic():
+        employees = EmployeeAttrition.objects.order_by().values(*SOURCE_FIELDS).iterator(chunk_size=chunk_size)
+        rollups = [
+            EmployeeDailyRollup(
+                key=rollup_key(dimensions),
+                **dict(zip(DIMENSIONS, dimensions)),
+                **dict(zip(METRICS, totals)),
+            )
+            for dimensions, totals in accumulate(employees).items()
+        ]
+        EmployeeDailyRollup.objects.all().delete()
+        EmployeeDailyRollup.objects.bulk_create(rollups, batch_size=500)
+
+    return len(rollups)
+
+
+def trend_period_starts(periods, granularity, today):
+    """First day of each of the last `periods` months (or Monday-start weeks), oldest first, and a label format"""
+    if granularity == 'week':
+        this_week = date.fromordinal(today.toordinal() - today.weekday())
+        starts = [date.fromordinal(this_week.toordinal() - 7 * i) for i in range(periods - 1, -1, -1)]
+        return starts, '%d %b'
+
+    month_index = today.year * 12 + today.month - 1
+    starts = [
+        date((month_index - i) // 12, (month_index - i) % 12 + 1, 1)
+        for i in range(periods - 1, -1, -1)
+    ]
+    return starts, '%b' if periods <= 12 else '%b %Y'
+
+
+class RollupSummary:
+    """
+    Analytics chart data computed from EmployeeDailyRollup rows.
+
+    Each method returns the same structure as the matching raw-table helper
+    in views.py, but works on at most one row per day and dimension
+    combination instead of one per employee.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    @classmethod
+    def load(cls, start_day=None, end_day=None):
+        rollups = EmployeeDailyRollup.objects.order_by()
+        if start_day is not None:
+            rollups = rollups.filter(day__gte=start_day)
+        if end_day is not None:
+            rollups = rollups.filter(day__lte=end_day)
+        return cls(list(rollups.values(*DIMENSIONS, *METRICS)))
+
+    def headline_stats(self):
+        stats = dict.fromkeys(['total', 'retained', 'high_risk', 'medium_risk', 'low_risk'], 0)
+        scored = 0
+        probability_sum = 0.0
+
+        for row in self.rows:
+            stats['total'] += row['count']
+            stats['retained'] += row['retained_count']
+            if row['risk_bucket'] is None:
+                continue
+            scored += row['count']
+            probability_sum += row['probability_sum']
+            risk = row['risk_bucket'] * RISK_BUCKET_WIDTH
+            band = 'high_risk' if risk >= 75 else 'medium_risk' if risk >= 50 else 'low_risk'
+            stats[band] += row['count']
+
+        stats['attrition'] = stats['total'] - stats['retained']
+        stats['avg_risk'] = probability_sum / scored if scored else None
+        return stats
+
+    def gender_analysis(self):
+        if not self.rows:
+            return {'labels': [], 'data': []}
+
+        attrition = defaultdict(int)
+        for row in self.rows:
+            attrition[row['gender']] += row['count'] - row['retained_count']
+        genders = sorted(gender for gender, count in attrition.items() if count)
+
+        if not genders:
+            return {'labels': ['Male', 'Female', 'Other'], 'data': [0, 0, 0]}
+        return {
+            'labels': [gender or 'Not Specified' for gender in genders],
+            'data': [attrition[gender] for gender in genders],
+        }
+
+    def satisfaction_analysis(self):
+        if not self.rows:
+            return {'labels': [], 'data': []}
+
+        data = [0] * len(SATISFACTION_LABELS)
+        for row in self.rows:
+            if 1 <= row['job_satisfaction'] <= len(SATISFACTION_LABELS):
+                data[row['job_satisfaction'] - 1] += row['count']
+        return {'labels': SATISFACTION_LABELS, 'data': data}
+
+    def trend(self, periods=12, granularity='month'):
+        starts, label_format = trend_period_starts(periods, granularity, timezone.localdate())
+        totals = [0] * periods
+        at_risk = [0] * periods
+
+        for row in self.rows:
+            if row['day'] < starts[0]:
+                continue
+            period = bisect_right(starts, row['day']) - 1
+            totals[period] += row['count']
+            if is_at_risk(row):
+                at_risk[period] += row['count']
+
+        return {
+            'labels': [start.strftime(label_format) for start in starts],
+            'attrition_rates': [
+                round((risk / total) * 100, 1) if total else 0 for risk, total in zip(at_risk, totals)
+            ],
+        }
+
+    def distributions(self):
+        """Age group, experience, salary and risk score histograms, as views.get_distribution_analysis"""
+        names = ['age_group_data', 'experience_data', 'salary_distribution', 'risk_score_distribution']
+        if not self.rows:
+            return {name: {'labels': [], 'data': []} for name in names}
+
+        age_groups = [0] * len(AGE_BAND_LABELS)
+        experience = [0] * len(TENURE_BAND_LABELS)
+        for row in filter(is_at_risk, self.rows):
+            if row['age_band']:
+                age_groups[row['age_band'] - 1] += row['count']
+            experience[row['tenure_band']] += row['count']
+
+        risk_scores = [0] * 10
+        salary_bands = defaultdict(int)
+        for row in self.rows:
+            if row['risk_bucket'] is not None:
+                risk_scores[row['risk_bucket'] * RISK_BUCKET_WIDTH // 10] += row['count']
+            salary_bands[row['salary_band']] += row['count']
+
+        return {
+            'age_group_data': {'labels': AGE_BAND_LABELS, 'data': age_groups},
+            'experience_data': {'labels': TENURE_BAND_LABELS, 'data': experience},
+            'salary_distribution': self._salary_ranges(salary_bands, ranges=7),
+            'risk_score_distribution': {
+                'labels': [f'{i}-{i+10}%' for i in range(0, 100, 10)],
+                'data': risk_scores,
+            },
+        }
+
+    @staticmethod
+    def _salary_ranges(salary_bands, ranges):
+        """Up to `ranges` equal-width salary ranges (whole bands) between the lowest and highest band"""
+        low, high = min(salary_bands), max(salary_bands)
+        width = -(-(high - low + 1) // ranges)
+        labels, data = [], []
+
+        for start in range(low, high + 1, width):
+            end = start + width
+            start_k, end_k = start * SALARY_BAND_WIDTH // 1000, end * SALARY_BAND_WIDTH // 1000
+            labels.append(f'{start_k}K+' if end > high else f'{start_k}-{end_k}K')
+            data.append(sum(salary_bands.get(band, 0) for band in range(start, end)))
+
+        return {'labels': labels, 'data': data}
@@ -0,0 +1,193 @@
+# search.py
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import EmployeeAttrition
+
+SEARCH_LIMIT = getattr(settings, 'EMPLOYEE_SEARCH_LIMIT', 500)
+
+# pg_trgm's default similarity threshold, used for typo-tolerant matches
+FUZZY_THRESHOLD = 0.3
+
+# SQLite FTS5 table (trigram tokenizer) over name and employee_id; rowid = EmployeeAttrition.id
+FTS_TABLE = 'employee_search'
+
+
+def trigrams(text):
+    """pg_trgm-style trigrams: lower-cased words padded with two leading spaces and one trailing"""
+    grams = set()
+    for word in text.lower().split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a, b):
+    """pg_trgm similarity(): shared trigrams over all trigrams"""
+    a, b = trigrams(a), trigrams(b)
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def word_similarity(query, text):
+    """Best similarity of the query to the whole text or any single word of it (like pg_trgm's word_similarity)"""
+    return max([similarity(query, text), *(similarity(query, word) for word in text.split())])
+
+
+def fts_available():
+    """
+    True when the FTS5 search table exists (SQLite built with FTS5 and the
+    migration applied). Looked up once per database connection, not on
+    every save and search.
+    """
+    if connection.vendor != 'sqlite':
+        return False
+    connection.ensure_connection()
+    checked = getattr(connection, '_employee_fts_available', None)
+    if checked is not None and checked[0] is connection.connection:
+        return checked[1]
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        available = cursor.fetchone() is not None
+    connection._employee_fts_available = (connection.connection, available)
+    return available
+
+
+def index_employees(rows):
+    """Add or refresh (id, employee_id, name) rows in the FTS5 table"""
+    if not fts_available():
+        return
+    rows = list(rows)
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+        cursor.executemany(f'INSERT INTO {FTS_TABLE} (rowid, employee_id, name) VALUES (%s, %s, %s)', rows)
+
+
+def unindex_employees(ids):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(pk,) for pk in ids])
+
+
+def rebuild_search_index():
+    """Refill the FTS5 table from EmployeeAttrition (no-op without it)"""
+    if not fts_available():
+        return
+    table = EmployeeAttrition._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(f'INSERT INTO {FTS_TABLE} (rowid, employee_id, name) SELECT id, employee_id, name FROM {table}')
+
+
+def _fts_phrase(query):
+    return '"{}"'.format(query.replace('"', '""'))
+
+
+def search_filter(query):
+    """
+    Q for every employee whose name or employee_id contains `query` (starts
+    with it, for queries under three characters). Uncapped and without
+    typo-tolerant matches, for counting what a search found.
+    """
+    query = query.strip()
+    if len(query) < 3:
+        return Q(employee_id__istartswith=query) | Q(name__istartswith=query)
+    if connection.vendor == 'sqlite' and fts_available():
+        return Q(pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [_fts_phrase(query)]))
+    return Q(employee_id__icontains=query) | Q(name__icontains=query)
+
+
+def search_employee_ids(query, limit=None):
+    """
+    EmployeeAttrition ids matching `query` on name or employee_id, best first.
+
+    Substring matches (which include prefixes) come from the trigram index
+    and rank above typo-tolerant matches, which need a pg_trgm-style
+    similarity of at least FUZZY_THRESHOLD. Exact IDs and prefixes rank
+    first. Queries shorter than three characters have no trigrams and fall
+    back to a prefix scan.
+    """
+    query = query.strip()
+    limit = limit or SEARCH_LIMIT
+
+    if len(query) < 3:
+        return _prefix_search(query, limit)
+    if connection.vendor == 'postgresql':
+        return _trigram_search(query, limit)
+    if not fts_available():
+        return _like_search(query, limit)
+
+    candidates = {}
+    with connection.cursor() as cursor:
+        phrase = _fts_phrase(query)
+        fuzzy = ' OR '.join('"{}"'.format(gram.replace('"', '""')) for gram in sorted(_index_trigrams(query)))
+        for match, substring in ((phrase, True), (fuzzy, False)):
+            if not match:
+                continue
+            cursor.execute(
+                f'SELECT rowid, employee_id, name FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}) LIMIT %s',
+                [match, limit],
+            )
+            for pk, employee_id, name in cursor.fetchall():
+                if pk not in candidates:
+                    candidates[pk] = _score(query, employee_id, name, substring)
+
+    ranked = sorted((score, pk) for pk, score in candidates.items() if score is not None)
+    return [pk for _, pk in ranked[:limit]]
+
+
+def _index_trigrams(query):
+    """Trigrams as the FTS5 trigram tokenizer stores them (no padding, case-folded)"""
+    text = query.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2) if text[i:i + 3].strip() == text[i:i + 3]}
+
+
+def _score(query, employee_id, name, substring):
+    """Sort key (lower is better), or None for fuzzy candidates below the threshold"""
+    needle = query.lower()
+    fields = (employee_id.lower(), name.lower())
+    best = max(word_similarity(query, employee_id), word_similarity(query, name))
+
+    if needle in fields:
+        return (0, -best)
+    if any(field.startswith(needle) for field in fields):
+        return (1, -best)
+    if substring:
+        return (2, -best)
+    if best >= FUZZY_THRESHOLD:
+        return (3, -best)
+    return None
+
+
+def _prefix_search(query, limit):
+    matches = EmployeeAttrition.objects.filter(Q(employee_id__istartswith=query) | Q(name__istartswith=query))
+    return list(matches.order_by('employee_id').values_list('pk', flat=True)[:limit])
+
+
+def _like_search(query, limit):
+    matches = EmployeeAttrition.objects.filter(Q(employee_id__icontains=query) | Q(name__icontains=query))
+    return list(matches.values_list('pk', flat=True)[:limit])
+
+
+def _trigram_search(query, limit):
+    """PostgreSQL: pg_trgm GIN indexes serve both the ILIKE and the % (similarity) operators"""
+    from django.contrib.postgres.lookups import TrigramSimilar
+    from django.contrib.postgres.search import TrigramSimilarity
+    from django.db.models import CharField
+    from django.db.models.functions import Greatest
+
+    CharField.register_lookup(TrigramSimilar)
+    matches = (
+        EmployeeAttrition.objects
+        .filter(
+            Q(employee_id__icontains=query) | Q(name__icontains=query) |
+            Q(employee_id__trigram_similar=query) | Q(name__trigram_similar=query)
+        )
+        .annotate(rank=Greatest(TrigramSimilarity('employee_id', query), TrigramSimilarity('name', query)))
+        .order_by('-rank')
+    )
+    return list(matches.values_list('pk', flat=True)[:limit])
@@ -0,0 +1,38 @@
+# signals.py
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import EmployeeAttrition
+from .rollups import SOURCE_FIELDS, apply_rollup_changes, source_row
+from .search import index_employees, unindex_employees
+from .versions import EMPLOYEE_REWRITES, bump_version
+
+# Keep EmployeeDailyRollup, the search index and the employee data version in
+# step with single-object saves and deletes (feedback form, admin). Bulk
+# ingest bypasses signals and updates all three itself (see ingest.py).
+
+
+@receiver(pre_save, sender=EmployeeAttrition)
+def remember_rollup_source(sender, instance, **kwargs):
+    """Stash the stored row so post_save can take it out of the rollup"""
+    instance._rollup_previous = None
+    if instance.pk is not None:
+        instance._rollup_previous = sender.objects.filter(pk=instance.pk).values(*SOURCE_FIELDS).first()
+
+
+@receiver(post_save, sender=EmployeeAttrition)
+def update_rollup_on_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_rollup_previous', None)
+    apply_rollup_changes(added=[source_row(instance)], removed=[previous] if previous else [])
+    index_employees([(instance.pk, instance.employee_id, instance.name)])
+    bump_version()
+    if previous:
+        bump_version(EMPLOYEE_REWRITES)
+
+
+@receiver(post_delete, sender=EmployeeAttrition)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    apply_rollup_changes(removed=[source_row(instance)])
+    unindex_employees([instance.pk])
+    bump_version()
+    bump_version(EMPLOYEE_REWRITES)
@@ -0,0 +1,82 @@
+# snapshots.py
+import os
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse
+
+from .exports import EXPORT_FORMATS, export_format_error, export_response
+from .versions import EMPLOYEE_DATA, get_version
+
+# Outside MEDIA_ROOT: snapshots hold employee data and are only served through the login-protected views
+SNAPSHOT_DIR = Path(getattr(settings, 'EMPLOYEE_EXPORT_SNAPSHOT_DIR', settings.BASE_DIR / 'var' / 'exports'))
+
+
+def request_data_version(request):
+    """(version, changed_at) of the employee data, looked up once per request"""
+    if not hasattr(request, '_employee_data_version'):
+        request._employee_data_version = get_version(EMPLOYEE_DATA)
+    return request._employee_data_version
+
+
+def export_etag(request, *args, **kwargs):
+    """ETag for an export view: view name, format and employee data version"""
+    version, _ = request_data_version(request)
+    return f"{request.resolver_match.url_name}-{request.GET.get('format', 'csv')}-v{version}"
+
+
+def export_last_modified(request, *args, **kwargs):
+    return request_data_version(request)[1]
+
+
+def write_snapshot(chunks, path, stale_pattern):
+    """
+    Pass chunks through while writing them to `path`; the file only appears
+    once complete, and then replaces older snapshots matching `stale_pattern`
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(f'.{path.name}.{os.getpid()}-{threading.get_ident()}.part')
+
+    try:
+        with open(partial, 'wb') as snapshot:
+            for chunk in chunks:
+                snapshot.write(chunk.encode() if isinstance(chunk, str) else chunk)
+                yield chunk
+        os.replace(partial, path)
+    finally:
+        # Client went away mid-download (or the export failed): drop the partial file
+        if partial.exists():
+            partial.unlink()
+
+    for stale in path.parent.glob(stale_pattern):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+
+
+def snapshot_export_response(request, queryset, basename, export_format='csv'):
+    """
+    Serve an export from its snapshot for the current data version.
+
+    The first download after a change streams from the database as usual
+    and writes the snapshot alongside; later downloads of the same version
+    are a FileResponse of that file, without querying EmployeeAttrition.
+    """
+    error = export_format_error(export_format)
+    if error:
+        return error
+
+    _, content_type, extension, _ = EXPORT_FORMATS[export_format]
+    version, _ = request_data_version(request)
+    path = SNAPSHOT_DIR / f'{basename}-v{version}.{extension}'
+
+    try:
+        snapshot = open(path, 'rb')
+    except FileNotFoundError:
+        stale_pattern = f'{basename}-v*.{extension}'
+        return export_response(
+            queryset, basename, export_format,
+            tee=lambda chunks: write_snapshot(chunks, path, stale_pattern),
+        )
+
+    return FileResponse(snapshot, as_attachment=True, filename=f'{basename}.{extension}', content_type=content_type)
@@ -1,3 +1,1310 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+import numpy as np
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.http import FileResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .management.commands.benchmark_model import make_sample_frame
+from .analytics_cache import cached_analytics
+from .batching import MicroBatcher
+from .columnar import employee_columns, load_columns
+from .ml_utils import (
+    NATIVE_METADATA_FILE, PICKLED_MODEL_PATH, SINGLE_PREDICTION_TIMEOUT, SOURCE_FEATURE_INDEX, SOURCE_FEATURES,
+    WARMUP_EMPLOYEE, AttritionPredictor, LoadedModel, pack_contributions, predictor, top_drivers,
+)
+from .model_registry import ModelRegistry, RegistryError
+from .exports import EXPORT_HEADERS
+from .ingest import CSV_DTYPES, build_employee_objects, bulk_upsert_employees, read_csv_chunks
+from .jobs import claim_next_job, run_worker
+from .versions import get_version
+from .models import EmployeeAttrition, EmployeeDailyRollup, President, UploadJob
+from .pagination import decode_cursor, keyset_page
+from .prediction_cache import PredictionCache
+from .search import fts_available, search_employee_ids
+from .histograms import Histogram, compute_histograms, equal_width_edges
+from . import rollups
+from .rollups import RollupSummary, apply_rollup_changes, rebuild_rollups, source_row
+from . import views
+from .views import (
+    get_distribution_analysis, get_gender_analysis, get_headline_stats, get_monthly_trend_analysis,
+    get_satisfaction_analysis,
+)
+from .tree_model import CompiledTreeModel
+
+
+def make_employee(employee_id, attrition_probability, **fields):
+    defaults = {
+        'name': f'Employee {employee_id}', 'age': 30, 'job_satisfaction': 3, 'working_hours': 40,
+        'years_at_company': 3, 'distance_from_home': 5, 'environment_satisfaction': 3,
+        'joining_salary': 40000, 'current_salary': 50000,
+        'is_retained': attrition_probability is not None and attrition_probability < 25,
+    }
+    defaults.update(fields)
+    return EmployeeAttrition.objects.create(
+        employee_id=employee_id, attrition_probability=attrition_probability, **defaults
+    )
+
+
+class FeatureEncoderTests(SimpleTestCase):
+    def setUp(self):
+        predictor.ensure_loaded()
+        if predictor.model is None:
+            self.skipTest("attrition model is not available")
+
+    def test_matches_get_dummies_path(self):
+        # 500 random rows contain every category, so drop_first drops the training reference level
+        df = make_sample_frame(500)
+        expected = predictor.preprocess_for_prediction(df).to_numpy(dtype=np.float32)
+        np.testing.assert_array_equal(predictor.encoder.transform(df), expected)
+
+    def test_categorical_dtype_matches_object_dtype(self):
+        # CSV chunks arrive with categorical dtypes, feedback rows with plain strings
+        df = make_sample_frame(200)
+        categorical = df.astype({col: 'category' for col in predictor.cat_cols})
+        categorical.loc[0, 'Education'] = None
+        expected = predictor.encoder.transform(df.assign(Education=categorical['Education'].astype(object)))
+        np.testing.assert_array_equal(predictor.encoder.transform(categorical), expected)
+
+    def test_single_row_keeps_its_categories(self):
+        df = make_sample_frame(1).assign(MaritalStatus='Single', Education='PhD')
+        X = predictor.encoder.transform(df)
+        self.assertEqual(X[0, predictor.model_columns.index('MaritalStatus_Single')], 1)
+        self.assertEqual(X[0, predictor.model_columns.index('Education_PhD')], 1)
+
+    def test_unknown_and_missing_categories_encode_as_zero(self):
+        df = make_sample_frame(2).assign(Education=['Diploma', None])
+        X = predictor.encoder.transform(df)
+        education = [i for i, col in enumerate(predictor.model_columns) if col.startswith('Education_')]
+        self.assertFalse(X[:, education].any())
+
+
+class ScoringTests(SimpleTestCase):
+    def setUp(self):
+        predictor.ensure_loaded()
+        if predictor.model is None:
+            self.skipTest("attrition model is not available")
+
+    def test_labels_match_model_predict(self):
+        X = predictor.encoder.transform(make_sample_frame(2000))
+        labels, _ = predictor.score_features(X)
+        np.testing.assert_array_equal(labels, predictor.model.predict(X))
+
+    def test_inplace_predict_matches_sklearn_wrapper(self):
+        df = make_sample_frame(2000)
+        _, probabilities = predictor.score_features(predictor.encoder.transform(df))
+        expected = predictor.model.predict_proba(predictor.preprocess_for_prediction(df))[:, 1] * 100
+        np.testing.assert_allclose(probabilities, expected, rtol=0, atol=1e-6)
+
+    def test_compiled_trees_match_xgboost(self):
+        compiled = CompiledTreeModel.from_booster(predictor.booster, predictor.iteration_range)
+        X = predictor.encoder.transform(make_sample_frame(5000))
+        X[::7, 0] = np.nan  # exercise the default (missing value) branches
+        expected = predictor.booster.inplace_predict(X, iteration_range=predictor.iteration_range)
+        np.testing.assert_allclose(compiled.inplace_predict(X), expected, rtol=0, atol=1e-6)
+
+    def test_compiled_artifact_round_trip(self):
+        path = os.path.join(tempfile.mkdtemp(), 'attrition_model.npz')
+        predictor.export_compiled_model(path)
+        compiled_predictor = AttritionPredictor(backend='compiled')
+        compiled_predictor.load_compiled_model(path)
+
+        df = make_sample_frame(500)
+        _, expected = predictor.predict_attrition_bulk(df)
+        _, probabilities = compiled_predictor.predict_attrition_bulk(df)
+        np.testing.assert_allclose(probabilities, expected, rtol=0, atol=1e-4)
+        np.testing.assert_array_equal(compiled_predictor.feature_importance, predictor.feature_importance)
+
+    def test_native_bundle_round_trip(self):
+        path = Path(tempfile.mkdtemp()) / 'attrition_model'
+        predictor.export_native_model(path)
+        native_predictor = AttritionPredictor(backend='native')
+        native_predictor.load_native_model(path)
+        self.assertIsInstance(native_predictor.encoder.mean.base, np.memmap)  # a view, not a copy
+
+        X = predictor.encoder.transform(make_sample_frame(500))
+        np.testing.assert_array_equal(native_predictor.encoder.transform(make_sample_frame(500)), X)
+        np.testing.assert_array_equal(native_predictor.predict_probabilities(X), predictor.predict_probabilities(X))
+        np.testing.assert_array_equal(native_predictor.feature_importance, predictor.feature_importance)
+        np.testing.assert_allclose(native_predictor.explain_features(X[:20]), predictor.explain_features(X[:20]),
+                                   atol=1e-6)
+
+        metadata = path / NATIVE_METADATA_FILE
+        metadata.write_text(metadata.read_text().replace('"format": 1', '"format": 99'))
+        with self.assertRaises(ValueError):
+            LoadedModel.from_native(path)
+
+
+class ExplanationTests(SimpleTestCase):
+    def setUp(self):
+        predictor.ensure_loaded()
+        if predictor.model is None:
+            self.skipTest("attrition model is not available")
+
+    def test_feature_importance(self):
+        data = predictor.feature_importance_data()
+        self.assertEqual(sorted(data['labels']), sorted(label for _, label in SOURCE_FEATURES))
+        self.assertAlmostEqual(sum(data['importance_scores']), 1, places=3)
+        self.assertEqual(data['importance_scores'], sorted(data['importance_scores'], reverse=True))
+
+    def test_contributions_sum_one_hot_columns(self):
+        import xgboost as xgb
+
+        X = predictor.encoder.transform(make_sample_frame(50))
+        contributions = predictor.explain_features(X)
+        self.assertEqual(contributions.shape, (50, len(SOURCE_FEATURES)))
+
+        # Per-column contributions plus the bias add up to the margin; grouping keeps the sum
+        raw = predictor.booster.predict(xgb.DMatrix(X, feature_names=predictor.booster.feature_names),
+                                        pred_contribs=True, approx_contribs=predictor.contributions == 'approx',
+                                        iteration_range=predictor.iteration_range)
+        np.testing.assert_allclose(contributions.sum(axis=1), raw[:, :-1].sum(axis=1), atol=1e-4)
+        education = SOURCE_FEATURE_INDEX['Education']
+        columns = [i for i, col in enumerate(predictor.model_columns) if col.startswith('Education_')]
+        np.testing.assert_allclose(contributions[:, education], raw[:, columns].sum(axis=1), atol=1e-5)
+
+    def test_chunk_encoded_once_for_scores_and_contributions(self):
+        chunks = [make_sample_frame(40, seed=1), make_sample_frame(25, seed=2)]
+        encoder = predictor.current.encoder
+        with mock.patch.object(encoder, 'transform', wraps=encoder.transform) as transform:
+            results = list(predictor.predict_attrition_chunks(chunks, explain=True))
+
+        self.assertEqual(transform.call_count, 2)
+        for chunk, labels, probabilities, contributions, version in results:
+            self.assertEqual(contributions.shape, (len(chunk), len(SOURCE_FEATURES)))
+            self.assertEqual(version, predictor.model_version)
+
+    def test_batched_single_predictions_carry_their_contributions(self):
+        employees = make_sample_frame(6, seed=3)
+        expected = predictor.explain_features(predictor.encoder.transform(employees))
+        futures = [predictor.batcher.submit(employee) for employee in employees.to_dict('records')]
+
+        for future, row in zip(futures, expected):
+            _, _, version, contributions = future.result(timeout=SINGLE_PREDICTION_TIMEOUT)
+            self.assertEqual(version, predictor.model_version)
+            np.testing.assert_allclose(contributions, row, atol=1e-5)
+
+    def test_batcher_timeout_scores_inline(self):
+        employee = make_sample_frame(1, seed=4).to_dict('records')[0]
+        expected = predictor.score_employees([employee])[0]
+        with mock.patch.object(predictor.batcher, 'max_batch_size', 8), \
+                mock.patch.object(predictor.batcher, 'submit', return_value=Future()), \
+                mock.patch('employee.ml_utils.SINGLE_PREDICTION_TIMEOUT', 0.01):
+            label, probability, version, contributions = predictor.predict_single_employee(employee)
+
+        self.assertEqual(version, predictor.model_version)
+        self.assertEqual((label, probability), (int(expected[0]), float(expected[1])))
+        np.testing.assert_allclose(contributions, expected[3], atol=1e-5)
+
+    def test_top_drivers(self):
+        contributions = np.zeros(len(SOURCE_FEATURES))
+        contributions[SOURCE_FEATURE_INDEX['WorkingHours']] = 0.8
+        contributions[SOURCE_FEATURE_INDEX['Age']] = 0.2
+        contributions[SOURCE_FEATURE_INDEX['CurrentSalary']] = -1.5
+        packed = pack_contributions(contributions)
+        self.assertEqual(len(packed), 2 * len(SOURCE_FEATURES))
+        self.assertEqual(top_drivers(packed), ['Working Hours', 'Age'])
+        self.assertEqual(top_drivers(None), [])
+
+
+class ReportDriversTests(TestCase):
+    def test_upload_contributions_shown_on_reports(self):
+        df = make_sample_frame(2).assign(EmployeeID=['D1', 'D2'])
+        contributions = np.zeros((2, len(SOURCE_FEATURES)))
+        contributions[0, SOURCE_FEATURE_INDEX['DistanceFromHome']] = 1.25
+        bulk_upsert_employees(build_employee_objects(df, [1, 0], [80.0, 10.0], contributions, model_version='v7'))
+
+        employee = EmployeeAttrition.objects.get(employee_id='D1')
+        self.assertEqual(employee.top_drivers, ['Distance From Home'])
+        self.assertEqual(employee.model_version, 'v7')
+        self.assertEqual(EmployeeAttrition.objects.get(employee_id='D2').top_drivers, [])
+
+        self.client.force_login(President.objects.create_user('hr', password='secret'))
+        self.assertContains(self.client.get(reverse('employee:reports')), 'Top drivers: Distance From Home')
+
+
+class FeedbackFormTests(TestCase):
+    def test_prediction_stored_with_its_model_version_and_drivers(self):
+        predictor.ensure_loaded()
+        if predictor.model is None:
+            self.skipTest("attrition model is not available")
+
+        response = self.client.post(reverse('employee:feedback'), {
+            'employee_id': 'F1', 'name': 'Form Employee', 'age': 29, 'gender': 'Female', 'marital_status': 'Single',
+            'job_satisfaction': 1, 'working_hours': 58, 'years_at_company': 1, 'distance_from_home': 28,
+            'environment_satisfaction': 1, 'health_condition': 'Poor', 'expectations_from_company': 'Promotion',
+            'joining_salary': 30000, 'current_salary': 31000, 'education': 'Bachelor',
+        })
+        self.assertEqual(response.status_code, 200)
+
+        employee = EmployeeAttrition.objects.get(employee_id='F1')
+        self.assertEqual(employee.data_source, 'Feedback Form')
+        self.assertEqual(employee.model_version, predictor.model_version)
+        self.assertEqual(len(employee.risk_contributions), 2 * len(SOURCE_FEATURES))
+
+
+class ModelRegistryTests(SimpleTestCase):
+    def setUp(self):
+        predictor.ensure_loaded()
+        if predictor.model is None or predictor.backend != 'xgboost':
+            self.skipTest("pickled attrition model is not available")
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = Path(root.name)
+        self.registry = ModelRegistry(self.root / 'registry')
+
+    def test_hot_reload_and_rollback(self):
+        first = self.registry.publish(PICKLED_MODEL_PATH, notes='baseline')
+        serving = AttritionPredictor(registry=self.registry)
+        serving.batcher.max_batch_size = 1
+        serving.ensure_loaded()
+        self.assertEqual(serving.model_version, first['version'])
+        self.assertFalse(serving.reload_if_changed())
+
+        compiled_path = self.root / 'attrition_model.npz'
+        predictor.export_compiled_model(compiled_path)
+        second = self.registry.publish(compiled_path)
+        self.assertEqual(second['backend'], 'compiled')
+        self.assertEqual(self.registry.current_version(), second['version'])
+
+        self.assertTrue(serving.reload_if_changed())
+        self.assertEqual(serving.current.backend, 'compiled')
+        self.assertEqual(serving.predict_single_employee(WARMUP_EMPLOYEE)[2], second['version'])
+        self.assertEqual(serving.cache.version, second['version'])
+
+        self.registry.activate(first['version'])
+        self.assertTrue(serving.reload_if_changed())
+        self.assertEqual(serving.model_version, first['version'])
+        self.assertEqual([m['version'] for m in self.registry.versions()], [first['version'], second['version']])
+
+    def test_publish_native_bundle_directory(self):
+        bundle = self.root / 'attrition_model'
+        predictor.export_native_model(bundle)
+        manifest = self.registry.publish(bundle)
+        self.assertEqual(manifest['backend'], 'native')
+
+        serving = AttritionPredictor(registry=self.registry)
+        serving.ensure_loaded()
+        self.assertEqual(serving.current.backend, 'native')
+        self.assertEqual(serving.model_version, manifest['version'])
+
+        # The checksum covers every file in the bundle
+        (self.registry.artifact_path(manifest) / 'mean.npy').write_bytes(b'tampered')
+        with self.assertRaises(RegistryError):
+            self.registry.activate(manifest['version'])
+
+    def test_broken_version_keeps_serving_model(self):
+        good = self.registry.publish(PICKLED_MODEL_PATH)
+        serving = AttritionPredictor(registry=self.registry)
+        serving.ensure_loaded()
+
+        broken = self.root / 'broken.npz'
+        broken.write_bytes(b'not a model')
+        self.registry.publish(broken)
+        self.assertFalse(serving.reload_if_changed())
+        self.assertEqual(serving.model_version, good['version'])
+
+        with self.assertRaises(RegistryError):
+            self.registry.activate('no-such-version')
+
+    def test_compile_model_compiles_the_pickle_not_current(self):
+        current = self.root / 'current.npz'
+        predictor.export_compiled_model(current)
+        self.registry.publish(current)
+
+        output = self.root / 'compiled.npz'
+        with mock.patch('employee.ml_utils.model_registry', self.registry):
+            call_command('compile_model', '--output', str(output), stdout=io.StringIO())
+
+        X = predictor.encoder.transform(make_sample_frame(500))
+        np.testing.assert_allclose(LoadedModel.from_compiled(output).predict_probabilities(X),
+                                   LoadedModel.from_pickle(PICKLED_MODEL_PATH).predict_probabilities(X), atol=1e-6)
+
+    def test_publish_command_rejects_corrupt_artifact(self):
+        broken = self.root / 'broken.npz'
+        broken.write_bytes(b'not a model')
+        with self.assertRaisesMessage(CommandError, 'does not load'):
+            call_command('model_registry', '--registry', str(self.registry.root), 'publish', str(broken),
+                         stdout=io.StringIO())
+
+        self.assertEqual(self.registry.versions(), [])
+        self.assertEqual(list(self.registry.versions_dir.iterdir()), [])
+        self.assertIsNone(self.registry.current_version())
+
+        # A good artifact still publishes and activates
+        call_command('model_registry', '--registry', str(self.registry.root), 'publish', PICKLED_MODEL_PATH,
+                     stdout=io.StringIO())
+        self.assertEqual(len(self.registry.versions()), 1)
+        with self.assertRaises(RegistryError):
+            self.registry.remove(self.registry.current_version())
+
+    def test_cache_ignores_swapped_out_version(self):
+        cache = PredictionCache(100)
+        cache.reset('new')
+        X = np.ones((3, 2), dtype=np.float32)
+        cache.predict(X, lambda rows: np.full(len(rows), 0.5), version='old')
+        self.assertEqual(cache.stats()['size'], 0)
+        cache.predict(X, lambda rows: np.full(len(rows), 0.5), version='new')
+        self.assertEqual(cache.stats()['size'], 1)
+
+
+class LazyLoadingTests(SimpleTestCase):
+    def test_model_loads_once_on_first_use(self):
+        lazy_predictor = AttritionPredictor()
+        self.assertFalse(lazy_predictor.loaded)
+
+        calls = []
+
+        def slow_load():
+            calls.append(1)
+            time.sleep(0.05)
+            lazy_predictor.loaded = True
+
+        with mock.patch.object(lazy_predictor, 'load_model', side_effect=slow_load):
+            threads = [threading.Thread(target=lazy_predictor.ensure_loaded) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(calls), 1)
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def test_concurrent_submissions_share_a_batch(self):
+        batches = []
+
+        def score_batch(items):
+            batches.append(len(items))
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher(score_batch, max_batch_size=16, max_wait=0.05)
+        futures = [batcher.submit(i) for i in range(10)]
+
+        self.assertEqual([future.result(timeout=5) for future in futures], [i * 2 for i in range(10)])
+        self.assertLess(len(batches), 10)
+        self.assertEqual(batcher.stats()['requests'], 10)
+
+    def test_batch_errors_reach_every_caller(self):
+        def score_batch(items):
+            raise ValueError("boom")
+
+        batcher = MicroBatcher(score_batch, max_batch_size=4, max_wait=0.01)
+        futures = [batcher.submit(i) for i in range(3)]
+        for future in futures:
+            with self.assertRaises(ValueError):
+                future.result(timeout=5)
+
+
+class PredictionCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.calls = []
+
+    def predict_fn(self, X):
+        self.calls.append(len(X))
+        return X[:, 0] / 10
+
+    def test_only_misses_reach_the_model(self):
+        cache = PredictionCache(max_size=100)
+        X = np.array([[1, 0], [2, 0], [1, 0]], dtype=np.float32)
+
+        np.testing.assert_array_equal(cache.predict(X, self.predict_fn), np.float32([0.1, 0.2, 0.1]))
+        X2 = np.array([[2, 0], [3, 0]], dtype=np.float32)
+        np.testing.assert_array_equal(cache.predict(X2, self.predict_fn), np.float32([0.2, 0.3]))
+
+        self.assertEqual(self.calls, [2, 1])
+        self.assertEqual(cache.stats()['hits'], 2)
+        self.assertEqual(cache.stats()['misses'], 3)
+
+    def test_reset_and_eviction(self):
+        cache = PredictionCache(max_size=2)
+        cache.predict(np.arange(6, dtype=np.float32).reshape(3, 2), self.predict_fn)
+        self.assertEqual(cache.stats()['size'], 2)
+
+        cache.reset('v2')
+        self.assertEqual(cache.stats()['size'], 0)
+        self.assertEqual(cache.stats()['version'], 'v2')
+
+    def test_cached_scores_match_model(self):
+        predictor.ensure_loaded()
+        if predictor.model is None:
+            self.skipTest("attrition model is not available")
+        X = predictor.encoder.transform(make_sample_frame(300))
+        predictor.score_features(X)
+        _, cached = predictor.score_features(X)
+        np.testing.assert_array_equal(cached, predictor.predict_probabilities(X) * 100)
+
+
+class HeadlineStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i, probability in enumerate([10, 20, 30, 55, 60, 80, 90, 95]):
+            make_employee(f'E{i}', probability)
+        cls.user = President.objects.create_user('hr', password='secret')
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            stats = get_headline_stats(EmployeeAttrition.objects.all())
+
+        self.assertEqual(stats['total'], 8)
+        self.assertEqual(stats['retained'], 2)
+        self.assertEqual(stats['attrition'], 6)
+        self.assertEqual((stats['low_risk'], stats['medium_risk'], stats['high_risk']), (3, 2, 3))
+        self.assertAlmostEqual(stats['avg_risk'], 55)
+
+    def test_views_use_shared_stats(self):
+        self.client.force_login(self.user)
+        for name in ('dashboard', 'reports', 'analytics'):
+            response = self.client.get(reverse(f'employee:{name}'))
+            self.assertEqual(response.context['total_employees'], 8)
+            self.assertEqual(response.context['high_risk'], 3)
+
+
+class TrendAnalysisTests(TestCase):
+    def month_start(self, tz):
+        now = timezone.localtime(timezone=tz)
+        return timezone.make_aware(datetime(now.year, now.month, 1), tz)
+
+    def test_monthly_trend_single_query(self):
+        make_employee('E1', 80)
+        make_employee('E2', 10)
+        make_employee('E3', 60, created_at=self.month_start(timezone.get_current_timezone()) - timedelta(days=1))
+
+        with self.assertNumQueries(1):
+            trend = get_monthly_trend_analysis(EmployeeAttrition.objects.all())
+
+        self.assertEqual(len(trend['labels']), 12)
+        self.assertEqual(trend['attrition_rates'][-1], 50.0)
+        self.assertEqual(trend['attrition_rates'][-2], 100.0)
+        self.assertEqual(sum(trend['attrition_rates'][:-2]), 0)
+
+    def test_months_follow_the_current_timezone(self):
+        new_york = ZoneInfo('America/New_York')
+        # 23:30 on the last day of last month in New York is already this month in UTC
+        make_employee('E1', 90, created_at=self.month_start(new_york) - timedelta(minutes=30))
+
+        with timezone.override(new_york):
+            trend = get_monthly_trend_analysis(EmployeeAttrition.objects.all(), periods=24)
+
+        self.assertEqual(len(trend['labels']), 24)
+        self.assertEqual(trend['attrition_rates'][-2:], [100.0, 0])
+
+    def test_weekly_granularity(self):
+        make_employee('E1', 70)
+        make_employee('E2', 20, created_at=timezone.now() - timedelta(weeks=2))
+
+        with self.assertNumQueries(1):
+            trend = get_monthly_trend_analysis(EmployeeAttrition.objects.all(), periods=4, granularity='week')
+
+        self.assertEqual(trend['attrition_rates'][-1], 100.0)
+        self.assertEqual(trend['attrition_rates'][-3], 0)
+        self.assertEqual(len(trend['labels']), 4)
+
+
+class HistogramTests(TestCase):
+    def test_bins_match_range_filters(self):
+        for i, (age, salary, probability) in enumerate([
+            (22, 30000, 55), (30, 41000, 80), (31, 52000, 10), (45, 64000, 95), (61, 99000, 50), (19, 70000, 90),
+        ]):
+            make_employee(f'E{i}', probability, age=age, current_salary=salary, years_at_company=i * 4)
+
+        employees = EmployeeAttrition.objects.all()
+        with self.assertNumQueries(2):
+            distributions = get_distribution_analysis(employees)
+
+        at_risk = employees.filter(attrition_probability__gte=50)
+        self.assertEqual(distributions['age_group_data']['data'], [
+            at_risk.filter(age__gte=22, age__lte=30).count(),
+            at_risk.filter(age__gte=31, age__lte=40).count(),
+            at_risk.filter(age__gte=41, age__lte=50).count(),
+            at_risk.filter(age__gte=51, age__lte=60).count(),
+            at_risk.filter(age__gt=60).count(),
+        ])
+        self.assertEqual(distributions['experience_data']['data'], [1, 1, 0, 1, 2])
+        self.assertEqual(distributions['risk_score_distribution']['data'], [0, 1, 0, 0, 0, 2, 0, 0, 1, 2])
+
+        edges = equal_width_edges(30000, 99000, 7)
+        self.assertEqual(distributions['salary_distribution']['labels'][0], '30-39K')
+        self.assertEqual(distributions['salary_distribution']['labels'][-1], f'{edges[6]//1000}K+')
+        self.assertEqual(sum(distributions['salary_distribution']['data']), 6)
+
+    def test_empty_queryset(self):
+        with self.assertNumQueries(1):
+            distributions = get_distribution_analysis(EmployeeAttrition.objects.none() | EmployeeAttrition.objects.all())
+        self.assertEqual(distributions['salary_distribution'], {'labels': [], 'data': []})
+
+    def test_fixed_histograms_share_one_query(self):
+        make_employee('E1', 12, age=40)
+        with self.assertNumQueries(1):
+            results = compute_histograms(EmployeeAttrition.objects.all(), {
+                'age': Histogram('age', edges=[None, 35, None]),
+                'risk': Histogram('attrition_probability', edges=[0, 50, 100]),
+            })
+        self.assertEqual(results['age'], {'labels': ['<35', '35+'], 'data': [0, 1]})
+        self.assertEqual(results['risk']['data'], [1, 0])
+
+
+class DailyRollupTests(TestCase):
+    def setUp(self):
+        for i, (probability, age, gender) in enumerate([
+            (10, 25, 'Male'), (20, 35, 'Female'), (55, 45, 'Male'), (80, 62, 'Female'), (None, 30, 'Male'),
+        ]):
+            make_employee(f'E{i}', probability, age=age, gender=gender, job_satisfaction=i % 5 + 1,
+                          years_at_company=i * 4, current_salary=30000 + i * 15000)
+
+    def rollup_rows(self):
+        return sorted(EmployeeDailyRollup.objects.values_list('key', 'count', 'retained_count', 'probability_sum'))
+
+    def assert_matches_raw_tables(self):
+        employees = EmployeeAttrition.objects.all()
+        summary = RollupSummary.load()
+
+        stats, expected = summary.headline_stats(), get_headline_stats(employees)
+        self.assertAlmostEqual(stats.pop('avg_risk'), expected.pop('avg_risk'))
+        self.assertEqual(stats, expected)
+        self.assertEqual(summary.gender_analysis(), get_gender_analysis(employees))
+        self.assertEqual(summary.satisfaction_analysis(), get_satisfaction_analysis(employees))
+        self.assertEqual(summary.trend(), get_monthly_trend_analysis(employees))
+
+        distributions, expected = summary.distributions(), get_distribution_analysis(employees)
+        for name in ('age_group_data', 'experience_data', 'risk_score_distribution'):
+            self.assertEqual(distributions[name], expected[name])
+        self.assertEqual(sum(distributions['salary_distribution']['data']), employees.count())
+
+        # Incremental maintenance agrees with a rebuild from scratch
+        incremental = self.rollup_rows()
+        rebuild_rollups()
+        self.assertEqual(self.rollup_rows(), incremental)
+
+    def test_save_and_delete_keep_rollup_in_step(self):
+        employee = EmployeeAttrition.objects.get(employee_id='E1')
+        employee.attrition_probability = 76
+        employee.is_retained = False
+        employee.save()
+        EmployeeAttrition.objects.get(employee_id='E0').delete()
+
+        self.assert_matches_raw_tables()
+
+    def test_bulk_upsert_updates_rollup(self):
+        updated = EmployeeAttrition.objects.get(employee_id='E2')
+        updated.pk = None
+        updated.attrition_probability = 5
+        updated.is_retained = True
+        added = EmployeeAttrition(employee_id='N1', name='New', age=51, job_satisfaction=2, working_hours=40,
+                                  years_at_company=20, distance_from_home=1, environment_satisfaction=3,
+                                  joining_salary=1, current_salary=99000, attrition_probability=99)
+
+        self.assertEqual(bulk_upsert_employees([updated, added]), (1, 1))
+        self.assert_matches_raw_tables()
+
+    def test_rebuild_reads_inside_its_transaction(self):
+        with CaptureQueriesContext(connection) as ctx:
+            rebuild_rollups()
+        sql = [query['sql'] for query in ctx.captured_queries]
+
+        read = next(i for i, q in enumerate(sql) if EmployeeAttrition._meta.db_table in q)
+        self.assertTrue(sql[0].startswith('SAVEPOINT'))
+        self.assertGreater(read, 0)
+        self.assertTrue(sql[-1].startswith('RELEASE SAVEPOINT'))
+
+    def test_concurrently_created_key_is_incremented(self):
+        EmployeeAttrition.objects.exclude(employee_id='E0').delete()
+        row = source_row(EmployeeAttrition.objects.get())
+        EmployeeDailyRollup.objects.all().delete()
+        increment = rollups._increment
+
+        def other_writer_first(key, *delta):
+            # Another transaction inserts the key between our UPDATE and INSERT
+            if not EmployeeDailyRollup.objects.filter(key=key).exists():
+                rebuild_rollups()
+                return 0
+            return increment(key, *delta)
+
+        with mock.patch.object(rollups, '_increment', side_effect=other_writer_first):
+            apply_rollup_changes(added=[row])
+        self.assertEqual(EmployeeDailyRollup.objects.get().count, 2)
+
+    def test_rollup_failure_rolls_back_the_save(self):
+        with mock.patch('employee.signals.apply_rollup_changes', side_effect=DatabaseError('rollup failed')):
+            with self.assertRaises(DatabaseError):
+                make_employee('E8', 30)
+        self.assertFalse(EmployeeAttrition.objects.filter(employee_id='E8').exists())
+        self.assert_matches_raw_tables()
+
+    def test_analytics_reads_rollup_only(self):
+        self.client.force_login(President.objects.create_user('hr', password='secret'))
+        EmployeeAttrition.objects.all().delete()
+        self.assertFalse(EmployeeDailyRollup.objects.exists())
+
+        rebuild_rollups()
+        make_employee('E9', 90)
+        response = self.client.get(reverse('employee:analytics'), {'time_range': 'all'})
+        self.assertEqual(response.context['total_employees'], 1)
+        self.assertEqual(response.context['high_risk'], 1)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        created_at = timezone.now()
+        # Two pairs share a timestamp, so the id tiebreaker matters
+        for i, offset in enumerate([0, 1, 1, 2, 3, 3, 4]):
+            make_employee(f'E{i}', 10 * i, created_at=created_at - timedelta(minutes=offset))
+        self.expected = list(EmployeeAttrition.objects.order_by('-created_at', '-id').values_list('employee_id', flat=True))
+
+    def test_walk_forward_and_back(self):
+        pages = []
+        page = keyset_page(EmployeeAttrition.objects.all(), page_size=3)
+        pages.append(page)
+        while page.next_cursor:
+            with self.assertNumQueries(1):
+                page = keyset_page(EmployeeAttrition.objects.all(), after=page.next_cursor, page_size=3)
+            pages.append(page)
+
+        self.assertEqual([emp.employee_id for page in pages for emp in page], self.expected)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertIsNone(pages[0].previous_cursor)
+
+        back = keyset_page(EmployeeAttrition.objects.all(), before=pages[2].previous_cursor, page_size=3)
+        self.assertEqual([emp.employee_id for emp in back], self.expected[3:6])
+        back = keyset_page(EmployeeAttrition.objects.all(), before=back.previous_cursor, page_size=3)
+        self.assertEqual([emp.employee_id for emp in back], self.expected[:3])
+        self.assertIsNone(back.previous_cursor)
+        self.assertIsNotNone(back.next_cursor)
+
+    def test_malformed_cursor_starts_from_first_page(self):
+        self.assertIsNone(decode_cursor('not a cursor'))
+        page = keyset_page(EmployeeAttrition.objects.all(), after='not a cursor', page_size=2)
+        self.assertEqual([emp.employee_id for emp in page], self.expected[:2])
+
+    def test_reports_page_loads_only_shown_columns(self):
+        self.client.force_login(President.objects.create_user('hr', password='secret'))
+        response = self.client.get(reverse('employee:reports'), {'page_size': 4})
+
+        employees = list(response.context['employees'])
+        self.assertEqual([emp.employee_id for emp in employees], self.expected[:4])
+        self.assertIn('working_hours', employees[0].get_deferred_fields())
+        self.assertEqual(response.context['total_employees'], 7)
+        self.assertContains(response, f'after={response.context["employees"].next_cursor}')
+
+
+class QueryPlanTests(TestCase):
+    """EXPLAIN QUERY PLAN for the hot view queries, so they don't regress to full table scans"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(20):
+            make_employee(f'E{i}', i * 5)
+        cls.user = President.objects.create_user('hr', password='secret')
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("query plans are checked on SQLite")
+        isolate_export_snapshots(self)
+        self.client.force_login(self.user)
+
+    def query_plans(self, run):
+        """(sql, plan) for every employee-table SELECT issued by run()"""
+        with CaptureQueriesContext(connection) as queries:
+            run()
+
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                sql = query['sql']
+                if sql.startswith('SELECT') and '"employee_' in sql:
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                    plans.append((sql, '\n'.join(row[-1] for row in cursor.fetchall())))
+        return plans
+
+    def assertIndexed(self, run, *indexes):
+        """Every employee-table query uses an index (no bare SCAN, no sort) and each named index is used"""
+        plans = self.query_plans(run)
+        self.assertTrue(plans)
+        for sql, plan in plans:
+            for line in plan.splitlines():
+                self.assertNotRegex(line, r'^SCAN \w+$', f"full table scan:\n{sql}\n{plan}")
+                self.assertNotIn('TEMP B-TREE FOR ORDER BY', line, f"unindexed sort:\n{sql}\n{plan}")
+
+        used = '\n'.join(plan for _, plan in plans)
+        for index in indexes:
+            self.assertIn(index, used)
+
+    def test_reports(self):
+        self.assertIndexed(lambda: self.client.get(reverse('employee:reports')),
+                           'employee_created_id_idx', 'employee_retained_prob_idx')
+
+        cursor = keyset_page(EmployeeAttrition.objects.all(), page_size=5).next_cursor
+        self.assertIndexed(lambda: self.client.get(reverse('employee:reports'), {'page_size': 5, 'after': cursor}),
+                           'SEARCH employee_employeeattrition USING INDEX employee_created_id_idx')
+
+    def test_downloads(self):
+        def download(name):
+            return lambda: b''.join(self.client.get(reverse(f'employee:{name}')).streaming_content)
+
+        self.assertIndexed(download('download_attrition_employees'), 'employee_attrition_prob_idx')
+        self.assertIndexed(download('download_retention_employees'), 'employee_retention_prob_idx')
+
+    def test_dashboard_and_analytics(self):
+        self.assertIndexed(lambda: self.client.get(reverse('employee:dashboard')), 'employee_retained_prob_idx')
+        self.assertIndexed(lambda: self.client.get(reverse('employee:analytics')),
+                           'SEARCH employee_employeedailyrollup USING INDEX')
+
+    def test_trend(self):
+        self.assertIndexed(lambda: get_monthly_trend_analysis(EmployeeAttrition.objects.all()),
+                           'USING COVERING INDEX employee_created_prob_idx')
+
+    def test_upload_worker_poll(self):
+        self.assertIndexed(claim_next_job, 'uploadjob_status_created_idx')
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.john = make_employee('E100', 80, name='John Smith')
+        self.jane = make_employee('E200', 20, name='Jane Smithers')
+        self.bob = make_employee('X300', 50, name='Bob Jones')
+
+    def names(self, query):
+        ids = search_employee_ids(query)
+        found = EmployeeAttrition.objects.in_bulk(ids)
+        return [found[pk].name for pk in ids]
+
+    def test_substring_and_prefix_ranking(self):
+        self.assertEqual(self.names('smith'), ['John Smith', 'Jane Smithers'])
+        self.assertEqual(self.names('jane'), ['Jane Smithers'])
+        self.assertEqual(self.names('E200'), ['Jane Smithers'])
+        self.assertEqual(self.names('E1'), ['John Smith'])
+
+    def test_fuzzy_matches_typos(self):
+        self.assertEqual(self.names('Smiht'), ['John Smith'])
+        self.assertEqual(self.names('Jnoes'), [])
+        self.assertEqual(self.names('Jonse'), ['Bob Jones'])
+
+    def test_index_follows_saves_deletes_and_bulk_ingest(self):
+        self.john.name = 'Johnny Walker'
+        self.john.save()
+        self.bob.delete()
+        new = EmployeeAttrition(employee_id='N400', name='Nina Walker', age=40, job_satisfaction=3, working_hours=40,
+                                years_at_company=2, distance_from_home=3, environment_satisfaction=3,
+                                joining_salary=1, current_salary=2, attrition_probability=10)
+        bulk_upsert_employees([new])
+
+        self.assertEqual(self.names('walker'), ['Johnny Walker', 'Nina Walker'])
+        self.assertNotIn('John Smith', self.names('John Smith'))
+        self.assertEqual(self.names('Jones'), [])
+
+    def test_reports_search(self):
+        self.client.force_login(President.objects.create_user('hr', password='secret'))
+        response = self.client.get(reverse('employee:reports'), {'search': 'smith'})
+
+        self.assertEqual([emp.name for emp in response.context['employees']], ['John Smith', 'Jane Smithers'])
+        self.assertEqual(response.context['total_employees'], 2)
+        self.assertEqual(response.context['high_risk'], 1)
+
+        # A typo-tolerant suggestion is listed but not counted as a match
+        response = self.client.get(reverse('employee:reports'), {'search': 'Smiht'})
+        self.assertEqual([emp.name for emp in response.context['employees']], ['John Smith'])
+        self.assertEqual(response.context['total_employees'], 0)
+
+    def test_reports_search_pages_and_counts_past_the_limit(self):
+        for i in range(7):
+            make_employee(f'S{i}', 90, name=f'Sam Smith {i}')
+        self.client.force_login(President.objects.create_user('hr', password='secret'))
+
+        seen, params = [], {'search': 'smith', 'page_size': 3}
+        with mock.patch('employee.search.SEARCH_LIMIT', 8):
+            while True:
+                page = self.client.get(reverse('employee:reports'), params).context['employees']
+                seen.append([emp.employee_id for emp in page])
+                if not page.next_cursor:
+                    break
+                params['after'] = page.next_cursor
+            response = self.client.get(reverse('employee:reports'),
+                                       {'search': 'smith', 'page_size': 3, 'before': page.previous_cursor})
+
+        self.assertEqual([len(ids) for ids in seen], [3, 3, 2])
+        self.assertEqual(len({pk for ids in seen for pk in ids}), 8)
+        self.assertEqual([emp.employee_id for emp in response.context['employees']], seen[1])
+        # Counted without the ranking cap
+        self.assertEqual(response.context['total_employees'], 9)
+        self.assertEqual(response.context['high_risk'], 8)
+
+    def test_fts_lookup_cached_per_connection(self):
+        fts_available()
+        with CaptureQueriesContext(connection) as queries:
+            self.john.save()
+            search_employee_ids('smith')
+        self.assertFalse([q for q in queries.captured_queries if 'sqlite_master' in q['sql']])
+
+
+def isolate_export_snapshots(test):
+    """Point export snapshots at a temporary directory for the duration of a test"""
+    snapshot_dir = tempfile.TemporaryDirectory()
+    test.addCleanup(snapshot_dir.cleanup)
+    patcher = mock.patch('employee.snapshots.SNAPSHOT_DIR', Path(snapshot_dir.name))
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    return Path(snapshot_dir.name)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.snapshot_dir = isolate_export_snapshots(self)
+        self.client.force_login(President.objects.create_user('hr', password='secret'))
+        for i, probability in enumerate([10, 92.25, 60, 20]):
+            make_employee(f'E{i}', probability)
+
+    def download(self, name):
+        response = self.client.get(reverse(f'employee:{name}'))
+        self.assertTrue(response.streaming)
+        return list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+    def test_attrition_export(self):
+        rows = self.download('download_attrition_employees')
+        self.assertEqual(rows[0], EXPORT_HEADERS)
+        self.assertEqual([row[0] for row in rows[1:]], ['E1', 'E2'])
+
+        employee = EmployeeAttrition.objects.get(employee_id='E1')
+        self.assertEqual(rows[1][-3:], ['92.2%', 'Feedback Form', employee.created_at.strftime('%Y-%m-%d %H:%M')])
+        self.assertEqual(rows[1][1:4], ['Employee E1', '30', employee.gender])
+
+    def test_retention_export(self):
+        rows = self.download('download_retention_employees')
+        self.assertEqual([(row[0], row[-3]) for row in rows[1:]], [('E0', '10.0%'), ('E3', '20.0%')])
+
+    def test_gzip_export_matches_csv(self):
+        plain = b''.join(self.client.get(reverse('employee:download_attrition_employees')).streaming_content)
+        response = self.client.get(reverse('employee:download_attrition_employees'), {'format': 'csv.gz'})
+
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="attrition_employees.csv.gz"')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), plain)
+
+    def test_columnar_exports(self):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest("pyarrow is not installed")
+
+        url = reverse('employee:download_retention_employees')
+        with mock.patch('employee.exports.EXPORT_CHUNK_SIZE', 1):
+            parquet = b''.join(self.client.get(url, {'format': 'parquet'}).streaming_content)
+            arrow = b''.join(self.client.get(url, {'format': 'arrow'}).streaming_content)
+
+        parquet_file = pq.ParquetFile(io.BytesIO(parquet))
+        self.assertEqual(parquet_file.metadata.num_row_groups, 2)
+        for table in (parquet_file.read(), pa.ipc.open_stream(arrow).read_all()):
+            self.assertEqual(table.column('employee_id').to_pylist(), ['E0', 'E3'])
+            self.assertEqual(table.column('attrition_probability').to_pylist(), [10, 20])
+            self.assertEqual(table.schema.field('age').type, pa.int32())
+            self.assertEqual(table.column('created_at').to_pylist()[0],
+                             EmployeeAttrition.objects.get(employee_id='E0').created_at)
+
+    def test_unknown_format(self):
+        response = self.client.get(reverse('employee:download_retention_employees'), {'format': 'xlsx'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_repeat_download_served_from_snapshot(self):
+        url = reverse('employee:download_attrition_employees')
+        first = self.client.get(url)
+        self.assertTrue(first.streaming)
+        body = b''.join(first.streaming_content)
+        etag = first['ETag']
+        self.assertEqual(len(list(self.snapshot_dir.glob('attrition_employees-v*.csv'))), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            repeat = self.client.get(url)
+            self.assertEqual(b''.join(repeat.streaming_content), body)
+        self.assertIsInstance(repeat, FileResponse)
+        self.assertEqual(repeat['ETag'], etag)
+        self.assertFalse([q for q in queries.captured_queries if 'employee_employeeattrition' in q['sql']])
+
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_writes_invalidate_snapshot(self):
+        url = reverse('employee:download_attrition_employees')
+        first = self.client.get(url)
+        b''.join(first.streaming_content)
+        version = get_version()[0]
+
+        make_employee('E9', 99)
+        self.assertEqual(get_version()[0], version + 1)
+
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertIn(b'E9', b''.join(second.streaming_content))
+        # Only the current version's snapshot is kept
+        self.assertEqual([p.name for p in self.snapshot_dir.glob('attrition_employees-v*.csv')],
+                         [f'attrition_employees-v{version + 1}.csv'])
+
+        bulk_upsert_employees([EmployeeAttrition.objects.get(employee_id='E9')])
+        self.assertEqual(get_version()[0], version + 2)
+
+
+class AnalyticsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client.force_login(President.objects.create_user('hr', password='secret'))
+        make_employee('E0', 90)
+        make_employee('E1', 10)
+
+    def rollup_queries(self, run):
+        with CaptureQueriesContext(connection) as queries:
+            response = run()
+        return response, [q for q in queries.captured_queries if 'employee_employeedailyrollup' in q['sql']]
+
+    def test_page_cached_until_data_changes(self):
+        url = reverse('employee:analytics')
+        response, queries = self.rollup_queries(lambda: self.client.get(url, {'time_range': 'all'}))
+        self.assertEqual(response.context['total_employees'], 2)
+        self.assertTrue(queries)
+
+        response, queries = self.rollup_queries(lambda: self.client.get(url, {'time_range': 'all'}))
+        self.assertEqual(response.context['total_employees'], 2)
+        self.assertEqual(response.context['selected_time_range'], 'all')
+        self.assertFalse(queries)
+
+        make_employee('E2', 80)
+        response, queries = self.rollup_queries(lambda: self.client.get(url, {'time_range': 'all'}))
+        self.assertEqual(response.context['total_employees'], 3)
+        self.assertEqual(response.context['high_risk'], 2)
+        self.assertTrue(queries)
+
+    def test_api_keyed_on_chart_type(self):
+        url = reverse('employee:analytics_api')
+        with mock.patch('employee.views.get_analytics_api_data', wraps=views.get_analytics_api_data) as build:
+            self.assertEqual(list(self.client.get(url, {'chart_type': 'satisfaction'}).json()), ['satisfaction_data'])
+            response = self.client.get(url, {'chart_type': 'risk_distribution'})
+            self.assertEqual(response.json()['risk_distribution']['data'], [1, 0, 1])
+            self.assertEqual(build.call_count, 2)
+
+            self.assertEqual(list(self.client.get(url, {'chart_type': 'satisfaction'}).json()), ['satisfaction_data'])
+            self.assertEqual(build.call_count, 2)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def build_concurrently(self, key, threads=8):
+        calls = []
+
+        def build():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'value': 42}
+
+        results = []
+        workers = [threading.Thread(target=lambda: results.append(cached_analytics(key, build)))
+                   for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return calls, results
+
+    def test_cold_key_built_once(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        backends = {
+            'locmem': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'filebased': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                          'LOCATION': cache_dir.name},
+        }
+        for name, backend in backends.items():
+            with self.subTest(name), override_settings(CACHES={'default': backend}):
+                calls, results = self.build_concurrently(f'analytics:test:{name}')
+                self.assertEqual(len(calls), 1)
+                self.assertEqual(results, [{'value': 42}] * 8)
+
+    def test_waits_for_other_process(self):
+        # Lock held elsewhere: wait for its value instead of building
+        cache.add('analytics:test:lock', True)
+        threading.Timer(0.2, lambda: cache.set('analytics:test', 'built elsewhere')).start()
+        self.assertEqual(cached_analytics('analytics:test', lambda: 'built here'), 'built elsewhere')
+
+
+class ColumnarSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        employee_columns.reset()
+        self.addCleanup(employee_columns.reset)
+
+        now = timezone.now()
+        rows = [
+            (10, 'Male', 1, 25, 2, 30000, 3), (55, 'Female', 2, 35, 7, 45000, 20), (80, 'Male', 5, 45, 12, 99000, 40),
+            (95, 'Female', 4, 58, 20, 120000, 100), (None, 'Male', 3, 19, 0, 25000, 200), (49.9, '', 3, 61, 4, 61000, 400),
+            (75, 'Male', 6, 30, 5, 52000, 0),
+        ]
+        for i, (probability, gender, satisfaction, age, years, salary, days_ago) in enumerate(rows):
+            make_employee(f'E{i}', probability, gender=gender, job_satisfaction=satisfaction, age=age,
+                          years_at_company=years, current_salary=salary, created_at=now - timedelta(days=days_ago))
+
+    def assertMatchesRollup(self, start_day=None):
+        columns = employee_columns.current().between(start_day)
+        summary = RollupSummary.load(start_day)
+
+        expected, stats = summary.headline_stats(), columns.headline_stats()
+        self.assertAlmostEqual(stats.pop('avg_risk'), expected.pop('avg_risk'), places=4)
+        self.assertEqual(stats, expected)
+        self.assertEqual(columns.gender_analysis(), summary.gender_analysis())
+        self.assertEqual(columns.satisfaction_analysis(), summary.satisfaction_analysis())
+        self.assertEqual(columns.trend(), summary.trend())
+        self.assertEqual(columns.trend(periods=30, granularity='week'), summary.trend(periods=30, granularity='week'))
+        self.assertEqual(columns.distributions(), summary.distributions())
+
+    def test_chunked_load(self):
+        whole = load_columns(EmployeeAttrition.objects.all())
+        with mock.patch('employee.columnar.LOAD_CHUNK_SIZE', 3):
+            chunked = load_columns(EmployeeAttrition.objects.all())
+        for name, column in whole.columns.items():
+            np.testing.assert_array_equal(chunked[name], column)
+            self.assertEqual(chunked[name].dtype, column.dtype)
+        self.assertEqual(chunked.categories, whole.categories)
+
+        empty = load_columns(EmployeeAttrition.objects.none())
+        self.assertEqual(len(empty), 0)
+        self.assertEqual({name: column.dtype for name, column in empty.columns.items()},
+                         {name: column.dtype for name, column in whole.columns.items()})
+
+    def test_matches_rollup(self):
+        for start_day in (None, timezone.localdate() - timedelta(days=30), timezone.localdate() + timedelta(days=1)):
+            with self.subTest(start_day=start_day):
+                self.assertMatchesRollup(start_day)
+
+    def test_incremental_refresh(self):
+        self.assertEqual(len(employee_columns.current()), 7)
+        self.assertEqual(employee_columns.stats()['loads'], 1)
+
+        # New rows (even back-dated ones) are appended by id, keeping created_at order
+        make_employee('N1', 60, gender='Other')
+        make_employee('N2', 20, created_at=timezone.now() - timedelta(days=300))
+        with CaptureQueriesContext(connection) as queries:
+            columns = employee_columns.current()
+        self.assertFalse([q for q in queries.captured_queries if 'COUNT(' in q['sql']])
+        self.assertEqual(employee_columns.stats(), {'rows': 9, 'loads': 1, 'appends': 1})
+        self.assertTrue((np.diff(columns['created_at'].astype(np.int64)) >= 0).all())
+        self.assertMatchesRollup()
+
+        # Updates and deletes reload
+        employee = EmployeeAttrition.objects.get(employee_id='E0')
+        employee.attrition_probability = 90
+        employee.save()
+        EmployeeAttrition.objects.get(employee_id='E1').delete()
+        self.assertEqual(len(employee_columns.current()), 8)
+        self.assertEqual(employee_columns.stats()['loads'], 2)
+        self.assertMatchesRollup()
+
+        # A queryset delete on its own is enough
+        EmployeeAttrition.objects.filter(employee_id='E2').delete()
+        self.assertEqual(len(employee_columns.current()), 7)
+        self.assertEqual(employee_columns.stats()['loads'], 3)
+        self.assertMatchesRollup()
+
+        # Unchanged data: no refresh
+        with self.assertNumQueries(1):
+            employee_columns.current()
+
+    def test_api_reads_columns(self):
+        self.client.force_login(President.objects.create_user('hr', password='secret'))
+        url = reverse('employee:analytics_api')
+        self.client.get(url, {'time_range': 'all', 'chart_type': 'trend'})
+
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(url, {'time_range': '30', 'chart_type': 'all'}).json()
+        self.assertFalse([q for q in queries.captured_queries
+                          if 'employee_employeeattrition' in q['sql'] or 'employee_employeedailyrollup' in q['sql']])
+
+        summary = RollupSummary.load(timezone.localdate() - timedelta(days=30))
+        self.assertEqual(data['satisfaction_data'], summary.satisfaction_analysis())
+        self.assertEqual(data['trend_data'], summary.trend())
+
+
+class BulkUpsertTests(TestCase):
+    def setUp(self):
+        self.stored = self.employee('B1', 'Stored', 30)
+        self.stored.created_at = timezone.now() - timedelta(days=40)
+        self.stored.data_source = 'Feedback Form'
+        self.stored.save()
+
+    def employee(self, employee_id, name, probability):
+        return EmployeeAttrition(
+            employee_id=employee_id, name=name, age=40, job_satisfaction=3, working_hours=40, years_at_company=5,
+            distance_from_home=3, environment_satisfaction=3, joining_salary=30000, current_salary=45000,
+            attrition_probability=probability, is_retained=probability < 25, data_source='CSV',
+        )
+
+    def upsert(self):
+        return bulk_upsert_employees([
+            self.employee('B1', 'Updated', 80),
+            self.employee('B2', 'First copy', 10),
+            self.employee('B3', 'New', 60),
+            self.employee('B2', 'Second copy', 20),  # later duplicate row wins
+        ], batch_size=2)
+
+    def assert_upserted(self, counts):
+        self.assertEqual(counts, (2, 1))
+        self.assertEqual(EmployeeAttrition.objects.count(), 3)
+        self.assertEqual(EmployeeAttrition.objects.get(employee_id='B2').name, 'Second copy')
+
+        updated = EmployeeAttrition.objects.get(employee_id='B1')
+        self.assertEqual((updated.pk, updated.name, updated.attrition_probability), (self.stored.pk, 'Updated', 80))
+        self.assertEqual(updated.data_source, 'CSV')
+        self.assertEqual(updated.created_at, self.stored.created_at)
+
+    def test_upsert_on_conflict(self):
+        if not connection.features.supports_update_conflicts_with_target:
+            self.skipTest("backend has no ON CONFLICT upsert")
+        self.assert_upserted(self.upsert())
+
+    def test_bulk_create_and_update_fallback(self):
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False):
+            self.assert_upserted(self.upsert())
+
+
+def sample_csv(n_rows, first_id=0, **overrides):
+    """Upload CSV bytes of `n_rows` valid employees, columns replaced by `overrides` (one value per row)"""
+    def choice(choices, i):
+        return choices[i % len(choices)][0]
+
+    rows = [{
+        'EmployeeID': f'U{first_id + i}', 'Name': f'Upload {i}', 'Age': 22 + i % 38,
+        'Gender': choice(EmployeeAttrition.GENDER_CHOICES, i),
+        'MaritalStatus': choice(EmployeeAttrition.MARITAL_STATUS_CHOICES, i),
+        'JobSatisfaction': 1 + i % 5, 'WorkingHours': 35 + i % 25, 'YearsAtCompany': i % 25,
+        'DistanceFromHome': 1 + i % 29, 'EnvironmentSatisfaction': 1 + (i + 2) % 5,
+        'HealthCondition': choice(EmployeeAttrition.HEALTH_CONDITION_CHOICES, i),
+        'ExpectationsFromCompany': choice(EmployeeAttrition.EXPECTATIONS_CHOICES, i),
+        'JoiningSalary': 20000 + 1000 * (i % 40), 'CurrentSalary': 30000 + 1500 * (i % 47),
+        'Education': choice(EmployeeAttrition.EDUCATION_CHOICES, i),
+    } for i in range(n_rows)]
+    for column, values in overrides.items():
+        for row, value in zip(rows, values):
+            row[column] = value
+
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue().encode()
+
+
+class UploadJobTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+        self.client.force_login(President.objects.create_user('hr', password='secret'))
+
+    def upload(self, data):
+        response = self.client.post(reverse('employee:upload_csv'), {'file': SimpleUploadedFile('staff.csv', data)},
+                                    HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        return response.json()
+
+    def test_upload_is_queued_then_processed_by_worker(self):
+        queued = self.upload(sample_csv(30))
+        self.assertEqual(self.client.get(queued['status_url']).json()['status'], UploadJob.STATUS_PENDING)
+        self.assertFalse(EmployeeAttrition.objects.exists())
+
+        run_worker(once=True)
+
+        status = self.client.get(queued['status_url']).json()
+        self.assertEqual(status['status'], UploadJob.STATUS_DONE)
+        self.assertEqual((status['rows_parsed'], status['rows_scored'], status['rows_persisted']), (30, 30, 30))
+        self.assertEqual((status['created_count'], status['updated_count']), (30, 0))
+        self.assertEqual(status['low_risk_count'] + status['medium_risk_count'] + status['high_risk_count'], 30)
+        self.assertEqual(EmployeeAttrition.objects.filter(data_source='CSV').count(), 30)
+
+        # The non-AJAX form redirects to the results page, which previews the job's employees
+        response = self.client.post(reverse('employee:upload_csv'), {'file': SimpleUploadedFile('s.csv', b'x')})
+        self.assertRedirects(response, f"{reverse('employee:upload_csv')}?job={UploadJob.objects.latest('pk').pk}",
+                             fetch_redirect_response=False)
+        response = self.client.get(reverse('employee:upload_csv'), {'job': queued['job_id']})
+        self.assertEqual(len(response.context['employees']), 30)
+
+    def test_failed_job_reports_its_error(self):
+        queued = self.upload(sample_csv(5, Age=['41', 'forty', '39', '50', '22']))
+        run_worker(once=True)
+
+        status = self.client.get(queued['status_url']).json()
+        self.assertEqual(status['status'], UploadJob.STATUS_FAILED)
+        self.assertEqual(status['error'], "Line 3: Age must be a whole number from -32768 to 32767, got 'forty'")
+        self.assertFalse(EmployeeAttrition.objects.exists())
+        self.assertEqual(self.client.get(reverse('employee:upload_job_status', args=[999])).status_code, 404)
+
+    @mock.patch('employee.ingest.DEFAULT_CHUNK_SIZE', 10)
+    def test_csv_spanning_several_chunks(self):
+        chunks = list(read_csv_chunks(io.BytesIO(sample_csv(25))))
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+        for chunk in chunks:
+            for column, dtype in CSV_DTYPES.items():
+                self.assertEqual(chunk[column].dtype, dtype, column)
+
+        queued = self.upload(sample_csv(25))
+        with mock.patch.object(predictor, 'score_frame', wraps=predictor.score_frame) as score:
+            run_worker(once=True)
+
+        self.assertEqual([len(call.args[0]) for call in score.call_args_list], [10, 10, 5])
+        status = self.client.get(queued['status_url']).json()
+        self.assertEqual((status['rows_parsed'], status['rows_scored'], status['rows_persisted']), (25, 25, 25))
+        self.assertEqual(EmployeeAttrition.objects.filter(data_source='CSV').count(), 25)
+
+    @mock.patch('employee.ingest.DEFAULT_CHUNK_SIZE', 10)
+    def test_bad_integer_in_later_chunk_names_line_and_column(self):
+        salaries = [50000] * 25
+        salaries[14] = 'n/a'
+        queued = self.upload(sample_csv(25, CurrentSalary=salaries))
+        run_worker(once=True)
+
+        status = self.client.get(queued['status_url']).json()
+        self.assertEqual(status['status'], UploadJob.STATUS_FAILED)
+        self.assertEqual(status['error'],
+                         "Line 16: CurrentSalary must be a whole number from -2147483648 to 2147483647, got 'n/a'")
+        # Chunks before the bad one are already saved
+        self.assertEqual(status['rows_persisted'], 10)
+
+        # Values that would overflow the compact dtype are rejected rather than wrapped
+        with self.assertRaisesMessage(ValueError, "Line 2: Age must be a whole number from -32768 to 32767, got '70000'"):
+            list(read_csv_chunks(io.BytesIO(sample_csv(2, Age=[70000, 30]))))
+
+    def test_stale_running_job_is_requeued(self):
+        job = UploadJob.objects.create(file=SimpleUploadedFile('staff.csv', sample_csv(3)))
+        claim_next_job()
+        UploadJob.objects.filter(pk=job.pk).update(rows_parsed=2, heartbeat_at=timezone.now() - timedelta(hours=1))
+
+        reclaimed = claim_next_job()
+        self.assertEqual((reclaimed.pk, reclaimed.attempts, reclaimed.rows_parsed), (job.pk, 2, 0))
+
+        # A job that keeps taking its worker down is eventually given up on
+        UploadJob.objects.filter(pk=job.pk).update(attempts=3, heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertIsNone(claim_next_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, UploadJob.STATUS_FAILED)
+
+        # A running job that is still beating is left alone
+        fresh = UploadJob.objects.create(file=SimpleUploadedFile('staff.csv', sample_csv(3)))
+        claim_next_job()
+        self.assertIsNone(claim_next_job())
+        fresh.refresh_from_db()
+        self.assertEqual((fresh.status, fresh.attempts), (UploadJob.STATUS_RUNNING, 1))
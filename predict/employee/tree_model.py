@@ -0,0 +1,125 @@
+# tree_model.py
+import json
+
+import numpy as np
+
+# Objectives whose raw margin goes through a sigmoid
+LOGISTIC_OBJECTIVES = ('binary:logistic', 'reg:logistic')
+
+# Rows evaluated at once; bounds the (rows x trees) node-index matrix
+BLOCK_SIZE = 4096
+
+
+def _parse_float(value):
+    """XGBoost >= 2 writes base_score as '[5E-1]', older versions as '5E-1'"""
+    return float(str(value).strip('[]'))
+
+
+class CompiledTreeModel:
+    """
+    Gradient-boosted trees flattened into NumPy arrays.
+
+    All trees share one node table (feature index, threshold, left/right
+    child, default direction for missing values, leaf value); leaves point
+    at themselves, so a batch is scored by stepping every (row, tree) pair
+    `max_depth` times and summing the leaf values. Needs only NumPy at
+    prediction time.
+    """
+
+    ARRAY_NAMES = ('feature', 'threshold', 'left', 'right', 'default_left', 'value', 'roots', 'params')
+
+    def __init__(self, feature, threshold, left, right, default_left, value, roots, params):
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.value = np.asarray(value, dtype=np.float32)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        # [base_margin, max_depth]
+        self.params = np.asarray(params, dtype=np.float64)
+        self.base_margin = float(self.params[0])
+        self.max_depth = int(self.params[1])
+
+    @classmethod
+    def from_booster(cls, booster, iteration_range=(0, 0)):
+        """Compile an xgboost.Booster (binary:logistic, numeric splits only)"""
+        model = json.loads(booster.save_raw(raw_format='json'))
+        learner = model['learner']
+
+        objective = learner['objective']['name']
+        if objective not in LOGISTIC_OBJECTIVES:
+            raise ValueError(f"Unsupported objective for compiled trees: {objective}")
+
+        trees = learner['gradient_booster']['model']['trees']
+        start, end = iteration_range
+        if end > 0:
+            trees = trees[start:end]
+
+        base_score = _parse_float(learner['learner_model_param']['base_score'])
+        base_margin = float(np.log(base_score / (1 - base_score)))
+
+        feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+        max_depth = 0
+        for tree in trees:
+            if any(tree['split_type']):
+                raise ValueError("Categorical splits are not supported by compiled trees")
+
+            offset = len(feature)
+            roots.append(offset)
+            tree_left = np.asarray(tree['left_children'])
+            tree_right = np.asarray(tree['right_children'])
+            is_leaf = tree_left == -1
+            own_index = np.arange(len(tree_left)) + offset
+
+            feature.extend(np.where(is_leaf, 0, tree['split_indices']))
+            threshold.extend(tree['split_conditions'])
+            left.extend(np.where(is_leaf, own_index, tree_left + offset))
+            right.extend(np.where(is_leaf, own_index, tree_right + offset))
+            default_left.extend(tree['default_left'])
+            value.extend(np.where(is_leaf, tree['split_conditions'], 0))
+
+            # Depth of each node from its parent (parents always precede children)
+            depth = np.zeros(len(tree_left), dtype=np.int64)
+            for node, parent in enumerate(tree['parents'][1:], start=1):
+                depth[node] = depth[parent] + 1
+            max_depth = max(max_depth, int(depth.max()))
+
+        return cls(feature, threshold, left, right, default_left, value, roots, [base_margin, max_depth])
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(*(arrays[name] for name in cls.ARRAY_NAMES))
+
+    def to_arrays(self):
+        return {name: getattr(self, name) for name in self.ARRAY_NAMES}
+
+    def predict_margin(self, X):
+        """Raw margin (log-odds) for each row of a float32 feature matrix"""
+        X = np.asarray(X, dtype=np.float32)
+        margin = np.empty(len(X), dtype=np.float64)
+
+        for start in range(0, len(X), BLOCK_SIZE):
+            block = X[start:start + BLOCK_SIZE]
+            flat = block.ravel()
+            row_offset = (np.arange(len(block), dtype=np.int64) * X.shape[1])[:, None]
+            node = np.broadcast_to(self.roots, (len(block), len(self.roots))).copy()
+
+            for _ in range(self.max_depth):
+                x = flat.take(row_offset + self.feature.take(node))
+                # NaN compares False, so missing values only go left where the split says so
+                go_left = (x < self.threshold.take(node)) | (np.isnan(x) & self.default_left.take(node))
+                next_node = np.where(go_left, self.left.take(node), self.right.take(node))
+                if np.array_equal(next_node, node):
+                    break  # every (row, tree) walk has reached a leaf
+                node = next_node
+
+            margin[start:start + len(block)] = self.value.take(node).sum(axis=1, dtype=np.float64)
+
+        return margin + self.base_margin
+
+    def inplace_predict(self, data, iteration_range=(0, 0), validate_features=False):
+        """Positive-class probabilities, mirroring xgboost.Booster.inplace_predict"""
+        if iteration_range != (0, 0):
+            raise ValueError("Compiled trees are truncated at compile time; iteration_range is not supported")
+        return 1.0 / (1.0 + np.exp(-self.predict_margin(data)))
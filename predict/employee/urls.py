@@ -6,6 +6,7 @@ urlpatterns = [
    path('feedback/' , views.feedback_form,name='feedback'),
    path('pdashboard/', views.president_dashboard, name='president_dashboard'),
    path("prediction/", views.upload_csv, name="upload_csv"),
+   path("prediction/jobs/<int:job_id>/", views.upload_job_status, name="upload_job_status"),
    path("login/", custom_login, name="custom_login"),
    path('reports/', views.reports, name='reports'),
     path('download-attrition/', views.download_attrition_employees, name='download_attrition_employees'),
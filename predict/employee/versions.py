@@ -0,0 +1,29 @@
+# versions.py
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DataVersion
+
+# DataVersion name for EmployeeAttrition; bumped by signals.py (single saves/deletes) and ingest.py
+EMPLOYEE_DATA = 'employee'
+# Bumped alongside EMPLOYEE_DATA only when existing employees are updated or deleted, so
+# readers that see just EMPLOYEE_DATA move can pick up the new rows by id instead of reloading
+EMPLOYEE_REWRITES = 'employee_rewrites'
+
+
+def bump_version(name=EMPLOYEE_DATA):
+    """Increment a data set's change counter (inside the caller's transaction, if any)"""
+    now = timezone.now()
+    if not DataVersion.objects.filter(name=name).update(version=F('version') + 1, changed_at=now):
+        DataVersion.objects.get_or_create(name=name, defaults={'version': 1, 'changed_at': now})
+
+
+def get_version(name=EMPLOYEE_DATA):
+    """(version, changed_at) of a data set; (0, None) before its first write"""
+    return DataVersion.objects.filter(name=name).values_list('version', 'changed_at').first() or (0, None)
+
+
+def get_versions(*names):
+    """Current version of each named data set (0 before its first write), in one query"""
+    versions = dict(DataVersion.objects.filter(name__in=names).values_list('name', 'version'))
+    return tuple(versions.get(name, 0) for name in names)
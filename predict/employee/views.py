@@ -1,139 +1,88 @@
-import pandas as pd
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from employee.models import President
 from .forms import EmployeeAttritionForm, CSVUploadForm, SubAdminCreationForm
-from .models import EmployeeAttrition
-from .ml_utils import predictor
-import csv
-from django.http import HttpResponse
-from django.db.models import Q
+from .models import EmployeeAttrition, UploadJob
+from .ml_utils import pack_contributions, predictor
+from .snapshots import export_etag, export_last_modified, snapshot_export_response
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page, ranked_page
+from .search import search_employee_ids, search_filter
+from django.http import JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import condition
+from django.db.models import Avg, Count, Q
 from django.utils import timezone
 
+# Columns rendered by the reports.html employee table
+REPORT_COLUMNS = [
+    'employee_id', 'name', 'age', 'gender', 'marital_status', 'years_at_company', 'job_satisfaction',
+    'attrition_probability', 'is_retained', 'risk_contributions', 'data_source', 'created_at',
+]
+
 @login_required(login_url='custom_login')
 def reports(request):
     # Get search query
     search_query = request.GET.get('search', '').strip()
     
     # Base queryset
-    employees = EmployeeAttrition.objects.all().order_by('-created_at')
+    employees = EmployeeAttrition.objects.all()
+    
+    try:
+        page_size = min(max(int(request.GET.get('page_size', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        page_size = DEFAULT_PAGE_SIZE
     
-    # Apply search filter if provided
     if search_query:
-        employees = employees.filter(
-            Q(name__icontains=search_query) |
-            Q(employee_id__icontains=search_query)
+        # Indexed name / ID search; the table pages through the best matches first
+        page = ranked_page(
+            employees.only(*REPORT_COLUMNS),
+            search_employee_ids(search_query),
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+            page_size=page_size,
+        )
+        # Totals count every employee the search matches, not just the ranked (capped) list
+        employees = employees.filter(search_filter(search_query))
+    else:
+        # One page of the table, loading only the columns reports.html shows
+        page = keyset_page(
+            employees.only(*REPORT_COLUMNS),
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+            page_size=page_size,
         )
     
-    # Calculate statistics
-    total_employees = employees.count()
-    retained_employees = employees.filter(is_retained=True).count()
-    attrition_employees = employees.filter(is_retained=False).count()
-    
-    # Risk categorization
-    high_risk = employees.filter(attrition_probability__gte=75).count()
-    medium_risk = employees.filter(attrition_probability__gte=50, attrition_probability__lt=75).count()
-    low_risk = employees.filter(attrition_probability__lt=50).count()
+    # Calculate statistics (one aggregate query; also the result count)
+    stats = get_headline_stats(employees)
     
     context = {
-        'employees': employees,
+        'employees': page,
+        'page_size': page_size,
         'search_query': search_query,
-        'total_employees': total_employees,
-        'retained_employees': retained_employees,
-        'attrition_employees': attrition_employees,
-        'high_risk': high_risk,
-        'medium_risk': medium_risk,
-        'low_risk': low_risk,
+        'total_employees': stats['total'],
+        'retained_employees': stats['retained'],
+        'attrition_employees': stats['attrition'],
+        'high_risk': stats['high_risk'],
+        'medium_risk': stats['medium_risk'],
+        'low_risk': stats['low_risk'],
     }
     
     return render(request, 'reports.html', context)
 
 @login_required(login_url='custom_login')
+@condition(etag_func=export_etag, last_modified_func=export_last_modified)
 def download_attrition_employees(request):
-    """Download CSV of employees at risk of attrition (is_retained=False)"""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="attrition_employees.csv"'
-    
-    writer = csv.writer(response)
-    # CSV Headers
-    writer.writerow([
-        'Employee ID', 'Name', 'Age', 'Gender', 'Marital Status',
-        'Job Satisfaction', 'Working Hours', 'Years at Company',
-        'Distance From Home', 'Environment Satisfaction', 'Health Condition',
-        'Expectations From Company', 'Joining Salary', 'Current Salary',
-        'Education', 'Attrition Risk (%)', 'Data Source', 'Date Added'
-    ])
-    
-    # Get attrition employees (is_retained=False)
+    """Download employees at risk of attrition (is_retained=False); ?format=csv|csv.gz|parquet|arrow"""
     attrition_employees = EmployeeAttrition.objects.filter(is_retained=False).order_by('-attrition_probability')
-    
-    for employee in attrition_employees:
-        writer.writerow([
-            employee.employee_id,
-            employee.name,
-            employee.age,
-            employee.gender,
-            employee.marital_status,
-            employee.job_satisfaction,
-            employee.working_hours,
-            employee.years_at_company,
-            employee.distance_from_home,
-            employee.environment_satisfaction,
-            employee.health_condition,
-            employee.expectations_from_company,
-            employee.joining_salary,
-            employee.current_salary,
-            employee.education,
-            f"{employee.attrition_probability:.1f}%",
-            employee.data_source,
-            employee.created_at.strftime('%Y-%m-%d %H:%M')
-        ])
-    
-    return response
+    return snapshot_export_response(request, attrition_employees, 'attrition_employees', request.GET.get('format', 'csv'))
 
 @login_required(login_url='custom_login')
+@condition(etag_func=export_etag, last_modified_func=export_last_modified)
 def download_retention_employees(request):
-    """Download CSV of employees likely to be retained (is_retained=True)"""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="retention_employees.csv"'
-    
-    writer = csv.writer(response)
-    # CSV Headers
-    writer.writerow([
-        'Employee ID', 'Name', 'Age', 'Gender', 'Marital Status',
-        'Job Satisfaction', 'Working Hours', 'Years at Company',
-        'Distance From Home', 'Environment Satisfaction', 'Health Condition',
-        'Expectations From Company', 'Joining Salary', 'Current Salary',
-        'Education', 'Attrition Risk (%)', 'Data Source', 'Date Added'
-    ])
-    
-    # Get retention employees (is_retained=True)
+    """Download employees likely to be retained (is_retained=True); ?format=csv|csv.gz|parquet|arrow"""
     retention_employees = EmployeeAttrition.objects.filter(is_retained=True).order_by('attrition_probability')
-    
-    for employee in retention_employees:
-        writer.writerow([
-            employee.employee_id,
-            employee.name,
-            employee.age,
-            employee.gender,
-            employee.marital_status,
-            employee.job_satisfaction,
-            employee.working_hours,
-            employee.years_at_company,
-            employee.distance_from_home,
-            employee.environment_satisfaction,
-            employee.health_condition,
-            employee.expectations_from_company,
-            employee.joining_salary,
-            employee.current_salary,
-            employee.education,
-            f"{employee.attrition_probability:.1f}%",
-            employee.data_source,
-            employee.created_at.strftime('%Y-%m-%d %H:%M')
-        ])
-    
-    return response
+    return snapshot_export_response(request, retention_employees, 'retention_employees', request.GET.get('format', 'csv'))
 
 
 @login_required(login_url='custom_login')
@@ -186,11 +135,14 @@ def feedback_form(request):
                 'Education': form.cleaned_data['education'],
             }
 
-            attrition_pred, probability_pred = predictor.predict_single_employee(employee_data)
+            attrition_pred, probability_pred, model_version, contributions = predictor.predict_single_employee(employee_data)
             employee = form.save(commit=False)
             employee.attrition = attrition_pred
             employee.attrition_probability = probability_pred
             employee.is_retained = probability_pred < 25
+            employee.model_version = model_version
+            if contributions is not None:
+                employee.risk_contributions = pack_contributions(contributions)
             employee.save()
 
             success = True
@@ -219,6 +171,7 @@ def feedback_form(request):
 def upload_csv(request):
     context = {
         "form": CSVUploadForm(),
+        "job": None,
         "employees": [],
         "low_risk_count": 0,
         "medium_risk_count": 0,
@@ -229,96 +182,62 @@ def upload_csv(request):
     if request.method == "POST":
         form = CSVUploadForm(request.POST, request.FILES)
         if form.is_valid():
-            csv_file = request.FILES['file']
-            try:
-                df = pd.read_csv(csv_file)
-
-                feature_columns = [
-                    'Age', 'Gender', 'MaritalStatus', 'JobSatisfaction', 'WorkingHours',
-                    'YearsAtCompany', 'DistanceFromHome', 'EnvironmentSatisfaction',
-                    'HealthCondition', 'ExpectationsFromCompany', 'JoiningSalary',
-                    'CurrentSalary', 'Education'
-                ]
-
-                df_features = df[feature_columns].copy()
-                attrition_predictions, attrition_probabilities = predictor.predict_attrition_bulk(df_features)
-
-                uploaded_employees = []
-                retained_count = 0
-
-                for idx, row in df.iterrows():
-                    probability = float(attrition_probabilities[idx])
-                    is_retained = probability < 25
-                    if is_retained:
-                        retained_count += 1
-
-                    employee_obj, created = EmployeeAttrition.objects.update_or_create(
-                        employee_id=row['EmployeeID'],
-                        defaults={
-                            "name": row.get("Name", "Unknown"),
-                            "age": row["Age"],
-                            "gender": row["Gender"],
-                            "marital_status": row["MaritalStatus"],
-                            "job_satisfaction": row["JobSatisfaction"],
-                            "working_hours": row["WorkingHours"],
-                            "years_at_company": row["YearsAtCompany"],
-                            "distance_from_home": row["DistanceFromHome"],
-                            "environment_satisfaction": row["EnvironmentSatisfaction"],
-                            "health_condition": row["HealthCondition"],
-                            "expectations_from_company": row["ExpectationsFromCompany"],
-                            "joining_salary": row["JoiningSalary"],
-                            "current_salary": row["CurrentSalary"],
-                            "education": row["Education"],
-                            "attrition": int(attrition_predictions[idx]),
-                            "attrition_probability": probability,
-                            "is_retained": is_retained,
-                            "data_source": "CSV",
-                        }
-                    )
-
-                    employee_obj.attrition_probability = probability
-                    uploaded_employees.append(employee_obj)
-
-                low_risk_count = sum(1 for emp in uploaded_employees if emp.attrition_probability < 50)
-                medium_risk_count = sum(1 for emp in uploaded_employees if 50 <= emp.attrition_probability < 75)
-                high_risk_count = sum(1 for emp in uploaded_employees if emp.attrition_probability >= 75)
-
-                messages.success(
-                    request,
-                    f"CSV uploaded successfully! {len(uploaded_employees)} employees processed with ML predictions. "
-                    f"🟢 {retained_count} RETAINED (<25% risk) | "
-                    f"Risk Distribution: {high_risk_count} High, {medium_risk_count} Medium, {low_risk_count} Low"
-                )
-
-                context.update({
-                    "form": CSVUploadForm(),
-                    "employees": uploaded_employees,
-                    "low_risk_count": low_risk_count,
-                    "medium_risk_count": medium_risk_count,
-                    "high_risk_count": high_risk_count,
-                    "retained_count": retained_count,
-                })
-
-            except Exception as e:
-                messages.error(request, f"Error processing file: {e}")
-                print(f"❌ CSV processing error: {e}")
+            # Only store the file here; the upload worker parses, scores and saves it
+            job = UploadJob.objects.create(file=request.FILES['file'])
+            status_url = reverse('employee:upload_job_status', args=[job.pk])
+
+            if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+                return JsonResponse({'job_id': job.pk, 'status_url': status_url})
+
+            messages.success(request, f"CSV queued for processing (job #{job.pk}).")
+            return redirect(f"{reverse('employee:upload_csv')}?job={job.pk}")
+
+    job_id = request.GET.get('job')
+    if job_id and job_id.isdigit():
+        job = UploadJob.objects.filter(pk=job_id).first()
+        context["job"] = job
+
+        if job is not None and job.status == UploadJob.STATUS_DONE:
+            preview = EmployeeAttrition.objects.in_bulk(job.preview_ids, field_name='employee_id')
+            context.update({
+                "employees": [preview[emp_id] for emp_id in job.preview_ids if emp_id in preview],
+                "low_risk_count": job.low_risk_count,
+                "medium_risk_count": job.medium_risk_count,
+                "high_risk_count": job.high_risk_count,
+                "retained_count": job.retained_count,
+            })
 
     return render(request, "prediction.html", context)
 
+
+@login_required(login_url='custom_login')
+def upload_job_status(request, job_id):
+    """JSON progress of a queued CSV upload, polled by prediction.html"""
+    job = get_object_or_404(UploadJob, pk=job_id)
+    return JsonResponse({
+        'job_id': job.pk,
+        'status': job.status,
+        'rows_parsed': job.rows_parsed,
+        'rows_scored': job.rows_scored,
+        'rows_persisted': job.rows_persisted,
+        'created_count': job.created_count,
+        'updated_count': job.updated_count,
+        'retained_count': job.retained_count,
+        'low_risk_count': job.low_risk_count,
+        'medium_risk_count': job.medium_risk_count,
+        'high_risk_count': job.high_risk_count,
+        'error': job.error,
+    })
+
 @login_required(login_url='custom_login')
 def dashboard(request):
-    # Get all employees
-    employees = EmployeeAttrition.objects.all()
-    
-    # Calculate statistics
-    total_employees = employees.count()
-    retained_employees = employees.filter(is_retained=True).count()
-    attrition_employees = employees.filter(is_retained=False).count()
-    
-    # Risk categorization
-    high_risk = employees.filter(attrition_probability__gte=75).count()
-    medium_risk = employees.filter(attrition_probability__gte=50, attrition_probability__lt=75).count()
-    low_risk = employees.filter(attrition_probability__lt=50).count()
+    # Calculate statistics (one aggregate query)
+    stats = get_headline_stats(EmployeeAttrition.objects.all())
+    total_employees = stats['total']
+    attrition_employees = stats['attrition']
+    high_risk = stats['high_risk']
+    medium_risk = stats['medium_risk']
+    low_risk = stats['low_risk']
     
     # Calculate percentages (avoid division by zero)
     if total_employees > 0:
@@ -334,7 +253,7 @@ def dashboard(request):
     
     context = {
         'total_employees': total_employees,
-        'retained_employees': retained_employees,
+        'retained_employees': stats['retained'],
         'attrition_employees': attrition_employees,
         'high_risk': high_risk,
         'medium_risk': medium_risk,
@@ -350,9 +269,13 @@ import json
 from datetime import datetime, timedelta
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.db.models import Avg, Count, Q, Max, Min
+from django.db.models.functions import TruncMonth, TruncWeek
 from employee.models import EmployeeAttrition
 from django.http import JsonResponse
+from .histograms import Histogram, compute_histograms
+from .rollups import RollupSummary, trend_period_starts
+from .analytics_cache import analytics_cache_key, cached_analytics
+from .columnar import COLUMNAR_ANALYTICS, employee_columns
 
 @login_required(login_url='custom_login')
 def analytics(request):
@@ -364,43 +287,63 @@ def analytics(request):
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
     
-    # Base queryset
-    employees = EmployeeAttrition.objects.all()
+    # Analytics read the daily rollup, so cost grows with days, not employees
+    start_day = end_day = None
     
     # Apply time filtering
     if time_range and time_range != 'all':
         try:
             days = int(time_range)
-            cutoff_date = timezone.now() - timedelta(days=days)
-            employees = employees.filter(created_at__gte=cutoff_date)
+            start_day = timezone.localdate() - timedelta(days=days)
         except (ValueError, TypeError):
             pass
     
     # Apply custom date range if provided
     if start_date and end_date:
         try:
-            start = datetime.strptime(start_date, '%Y-%m-%d')
-            end = datetime.strptime(end_date, '%Y-%m-%d')
-            employees = employees.filter(created_at__gte=start, created_at__lte=end)
+            start_day = datetime.strptime(start_date, '%Y-%m-%d').date()
+            end_day = datetime.strptime(end_date, '%Y-%m-%d').date()
         except ValueError:
             pass
     
+    # Cached per resolved date range until the employee data changes
+    context = cached_analytics(
+        analytics_cache_key('page', start_day, end_day),
+        lambda: get_analytics_context(start_day, end_day),
+    )
+    context = dict(context)
+    context.update({
+        # Follows the loaded model version rather than the data version
+        'feature_importance': json.dumps(get_feature_importance_data()),
+        # Filter values
+        'selected_time_range': time_range,
+        'start_date': start_date,
+        'end_date': end_date,
+    })
+    
+    return render(request, 'analytics.html', context)
+
+
+def get_analytics_context(start_day=None, end_day=None):
+    """Metrics and chart JSON for analytics.html, computed from the daily rollup"""
+    summary = RollupSummary.load(start_day, end_day)
+    
     # Basic Statistics
-    total_employees = employees.count()
-    retained_employees = employees.filter(is_retained=True).count()
-    attrition_employees = employees.filter(is_retained=False).count()
+    stats = summary.headline_stats()
+    total_employees = stats['total']
+    retained_employees = stats['retained']
+    attrition_employees = stats['attrition']
     
     # Risk categorization
-    high_risk = employees.filter(attrition_probability__gte=75).count()
-    medium_risk = employees.filter(attrition_probability__gte=50, attrition_probability__lt=75).count()
-    low_risk = employees.filter(attrition_probability__lt=50).count()
+    high_risk = stats['high_risk']
+    medium_risk = stats['medium_risk']
+    low_risk = stats['low_risk']
     
     # Calculate rates
     if total_employees > 0:
         attrition_rate = round((attrition_employees / total_employees) * 100, 1)
         retention_rate = round((retained_employees / total_employees) * 100, 1)
-        avg_risk_score = employees.aggregate(Avg('attrition_probability'))['attrition_probability__avg'] or 0
-        avg_risk_score = round(avg_risk_score, 1)
+        avg_risk_score = round(stats['avg_risk'] or 0, 1)
     else:
         attrition_rate = retention_rate = avg_risk_score = 0
     
@@ -411,31 +354,23 @@ def analytics(request):
     }
     
     # Gender Analysis (replacing department analysis)
-    gender_data = get_gender_analysis(employees)
+    gender_data = summary.gender_analysis()
     
     # Job Satisfaction Analysis
-    satisfaction_data = get_satisfaction_analysis(employees)
+    satisfaction_data = summary.satisfaction_analysis()
     
     # Monthly Trend Analysis (simulated based on created_at)
-    trend_data = get_monthly_trend_analysis(employees)
+    trend_data = summary.trend()
     
     # Hiring vs Attrition (quarterly simulation)
     hiring_attrition_data = get_hiring_attrition_simulation()
     
-    # Age Group Analysis
-    age_group_data = get_age_group_analysis(employees)
-    
-    # Experience Level Analysis (years_at_company)
-    experience_data = get_experience_analysis(employees)
-    
-    # Salary Distribution
-    salary_distribution = get_salary_distribution(employees)
-    
-    # Risk Score Distribution
-    risk_score_distribution = get_risk_score_distribution(employees)
-    
-    # Feature Importance (based on your actual model fields)
-    feature_importance = get_feature_importance_data()
+    # Age group, experience level, salary and risk score histograms
+    distributions = summary.distributions()
+    age_group_data = distributions['age_group_data']
+    experience_data = distributions['experience_data']
+    salary_distribution = distributions['salary_distribution']
+    risk_score_distribution = distributions['risk_score_distribution']
     
     context = {
         # Basic metrics
@@ -459,15 +394,25 @@ def analytics(request):
         'experience_data': json.dumps(experience_data),
         'salary_distribution': json.dumps(salary_distribution),
         'risk_score_distribution': json.dumps(risk_score_distribution),
-        'feature_importance': json.dumps(feature_importance),
-        
-        # Filter values
-        'selected_time_range': time_range,
-        'start_date': start_date,
-        'end_date': end_date,
     }
     
-    return render(request, 'analytics.html', context)
+    return context
+
+
+def get_headline_stats(employees):
+    """
+    Headline counters for dashboard, reports and analytics in a single
+    aggregate query (one pass over the table instead of one COUNT each)
+    """
+    return employees.aggregate(
+        total=Count('id'),
+        retained=Count('id', filter=Q(is_retained=True)),
+        attrition=Count('id', filter=Q(is_retained=False)),
+        high_risk=Count('id', filter=Q(attrition_probability__gte=75)),
+        medium_risk=Count('id', filter=Q(attrition_probability__gte=50, attrition_probability__lt=75)),
+        low_risk=Count('id', filter=Q(attrition_probability__lt=50)),
+        avg_risk=Avg('attrition_probability'),
+    )
 
 
 def get_gender_analysis(employees):
@@ -537,63 +482,40 @@ def get_satisfaction_analysis(employees):
     }
 
 
-def get_monthly_trend_analysis(employees):
+def get_monthly_trend_analysis(employees, periods=12, granularity='month'):
     """
-    Get monthly attrition trends based on created_at field
+    Attrition trend (share of employees with risk >= 50%) for the last
+    `periods` months or weeks, in the current timezone, from one GROUP BY
+    query; periods without data are filled with 0
     """
-    if employees.count() == 0:
-        months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
-                  'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-        return {
-            'labels': months,
-            'attrition_rates': [0] * 12
-        }
-    
-    # Get monthly employee counts for the past 12 months
-    monthly_data = []
-    months = []
-    
-    current_date = timezone.now()
-    for i in range(12):
-        # Calculate month start and end
-        if i == 0:
-            month_start = current_date.replace(day=1)
-        else:
-            if month_start.month == 1:
-                month_start = month_start.replace(year=month_start.year - 1, month=12, day=1)
-            else:
-                month_start = month_start.replace(month=month_start.month - 1, day=1)
-        
-        # Calculate next month for end date
-        if month_start.month == 12:
-            month_end = month_start.replace(year=month_start.year + 1, month=1, day=1)
-        else:
-            month_end = month_start.replace(month=month_start.month + 1, day=1)
-        
-        # Count employees created in this month with high attrition risk
-        month_count = employees.filter(
-            created_at__gte=month_start,
-            created_at__lt=month_end,
-            attrition_probability__gte=50
-        ).count()
-        
-        total_month = employees.filter(
-            created_at__gte=month_start,
-            created_at__lt=month_end
-        ).count()
-        
-        # Calculate attrition rate for the month
-        if total_month > 0:
-            month_rate = round((month_count / total_month) * 100, 1)
-        else:
-            month_rate = 0
-        
-        months.insert(0, month_start.strftime('%b'))
-        monthly_data.insert(0, month_rate)
-    
+    tz = timezone.get_current_timezone()
+    now = timezone.localtime(timezone=tz)
+
+    # Start of each period, oldest first
+    starts, label_format = trend_period_starts(periods, granularity, now.date())
+    trunc = (TruncWeek if granularity == 'week' else TruncMonth)('created_at', tzinfo=tz)
+
+    period_starts = [timezone.make_aware(datetime.combine(day, datetime.min.time()), tz) for day in starts]
+
+    rows = (
+        employees.filter(created_at__gte=period_starts[0])
+        .annotate(period=trunc)
+        .values('period')
+        .annotate(total=Count('id'), at_risk=Count('id', filter=Q(attrition_probability__gte=50)))
+        .order_by('period')
+    )
+    counts = {row['period'].date(): (row['at_risk'], row['total']) for row in rows}
+
+    labels = []
+    attrition_rates = []
+    for start in period_starts:
+        at_risk, total = counts.get(start.date(), (0, 0))
+        labels.append(start.strftime(label_format))
+        attrition_rates.append(round((at_risk / total) * 100, 1) if total else 0)
+
     return {
-        'labels': months,
-        'attrition_rates': monthly_data
+        'labels': labels,
+        'attrition_rates': attrition_rates
     }
 
 
@@ -608,142 +530,44 @@ def get_hiring_attrition_simulation():
     }
 
 
-def get_age_group_analysis(employees):
-    """
-    Analyze attrition by age groups using existing age field
-    """
-    if employees.count() == 0:
-        return {'labels': [], 'data': []}
-    
-    # Define age ranges and count high-risk employees in each
-    age_groups = {
-        '22-30': employees.filter(age__gte=22, age__lte=30, attrition_probability__gte=50).count(),
-        '31-40': employees.filter(age__gte=31, age__lte=40, attrition_probability__gte=50).count(),
-        '41-50': employees.filter(age__gte=41, age__lte=50, attrition_probability__gte=50).count(),
-        '51-60': employees.filter(age__gte=51, age__lte=60, attrition_probability__gte=50).count(),
-        '60+': employees.filter(age__gt=60, attrition_probability__gte=50).count(),
-    }
-    
-    return {
-        'labels': list(age_groups.keys()),
-        'data': list(age_groups.values())
-    }
-
-
-def get_experience_analysis(employees):
-    """
-    Analyze attrition by years of experience using years_at_company
-    """
-    if employees.count() == 0:
-        return {'labels': [], 'data': []}
-    
-    # Group by years at company
-    experience_groups = {
-        '0-2 years': employees.filter(years_at_company__gte=0, years_at_company__lte=2, attrition_probability__gte=50).count(),
-        '3-5 years': employees.filter(years_at_company__gte=3, years_at_company__lte=5, attrition_probability__gte=50).count(),
-        '6-10 years': employees.filter(years_at_company__gte=6, years_at_company__lte=10, attrition_probability__gte=50).count(),
-        '11-15 years': employees.filter(years_at_company__gte=11, years_at_company__lte=15, attrition_probability__gte=50).count(),
-        '15+ years': employees.filter(years_at_company__gt=15, attrition_probability__gte=50).count(),
-    }
-    
-    return {
-        'labels': list(experience_groups.keys()),
-        'data': list(experience_groups.values())
-    }
-
-
-def get_salary_distribution(employees):
+def get_distribution_analysis(employees):
     """
-    Get salary distribution using current_salary field
+    Age, experience, salary and risk score histograms for the analytics page
+    (two aggregate queries in total, see histograms.compute_histograms)
     """
-    if employees.count() == 0:
-        return {'labels': [], 'data': []}
-    
-    # Get min and max salary to create dynamic ranges
-    salary_stats = employees.aggregate(
-        min_salary=Min('current_salary'),
-        max_salary=Max('current_salary')
-    )
-    
-    min_sal = salary_stats['min_salary'] or 30000
-    max_sal = salary_stats['max_salary'] or 100000
-    
-    # Create salary ranges based on actual data
-    ranges = []
-    range_size = (max_sal - min_sal) / 7  # 7 ranges
-    
-    for i in range(7):
-        range_start = int(min_sal + (i * range_size))
-        range_end = int(min_sal + ((i + 1) * range_size))
-        
-        if i == 6:  # Last range
-            count = employees.filter(current_salary__gte=range_start).count()
-            label = f'{range_start//1000}K+'
-        else:
-            count = employees.filter(current_salary__gte=range_start, current_salary__lt=range_end).count()
-            label = f'{range_start//1000}-{range_end//1000}K'
-        
-        ranges.append({
-            'label': label,
-            'count': count
-        })
-    
-    return {
-        'labels': [r['label'] for r in ranges],
-        'data': [r['count'] for r in ranges]
-    }
-
+    at_risk = Q(attrition_probability__gte=50)
+    histograms = compute_histograms(employees, {
+        # High-risk employees by age group
+        'age_group_data': Histogram(
+            'age', edges=[22, 31, 41, 51, 61, None], filter=at_risk,
+            labels=['22-30', '31-40', '41-50', '51-60', '60+'],
+        ),
+        # High-risk employees by years at company
+        'experience_data': Histogram(
+            'years_at_company', edges=[0, 3, 6, 11, 16, None], filter=at_risk,
+            labels=['0-2 years', '3-5 years', '6-10 years', '11-15 years', '15+ years'],
+        ),
+        # 7 equal-width ranges between the lowest and highest current salary
+        'salary_distribution': Histogram(
+            'current_salary', bins=7,
+            label=lambda start, end: f'{start//1000}-{end//1000}K' if end is not None else f'{start//1000}K+',
+        ),
+        'risk_score_distribution': Histogram(
+            'attrition_probability', edges=[*range(0, 100, 10), None],
+            labels=[f'{i}-{i+10}%' for i in range(0, 100, 10)],
+        ),
+    })
 
-def get_risk_score_distribution(employees):
-    """
-    Get risk score distribution using attrition_probability field
-    """
-    if employees.count() == 0:
-        return {'labels': [], 'data': []}
-    
-    # Define risk score ranges
-    risk_ranges = {}
-    labels = []
-    
-    for i in range(0, 100, 10):
-        range_label = f'{i}-{i+10}%'
-        labels.append(range_label)
-        
-        if i == 90:  # Last range
-            count = employees.filter(attrition_probability__gte=i).count()
-        else:
-            count = employees.filter(
-                attrition_probability__gte=i, 
-                attrition_probability__lt=i+10
-            ).count()
-        
-        risk_ranges[range_label] = count
-    
-    return {
-        'labels': labels,
-        'data': list(risk_ranges.values())
-    }
+    if histograms.pop('total') == 0:
+        return {name: {'labels': [], 'data': []} for name in histograms}
+    return histograms
 
 
 def get_feature_importance_data():
     """
-    Feature importance based on your actual EmployeeAttrition model fields
+    Global feature importance of the loaded model (total split gain per source feature)
     """
-    return {
-        'labels': [
-            'Job Satisfaction',
-            'Working Hours',
-            'Environment Satisfaction', 
-            'Distance From Home',
-            'Current Salary',
-            'Health Condition',
-            'Years at Company',
-            'Age',
-            'Education Level',
-            'Marital Status'
-        ],
-        'importance_scores': [0.45, 0.32, 0.28, 0.22, 0.18, 0.15, 0.12, 0.10, 0.08, 0.05]
-    }
+    return predictor.feature_importance_data()
 
 
 @login_required(login_url='custom_login')
@@ -756,29 +580,47 @@ def analytics_api(request):
         chart_type = request.GET.get('chart_type', 'all')
         
         # Apply filters
-        employees = EmployeeAttrition.objects.all()
+        start_day = None
         if time_range != 'all':
             try:
                 days = int(time_range)
-                cutoff_date = timezone.now() - timedelta(days=days)
-                employees = employees.filter(created_at__gte=cutoff_date)
+                start_day = timezone.localdate() - timedelta(days=days)
             except (ValueError, TypeError):
                 pass
+        granularity = 'week' if request.GET.get('granularity') == 'week' else 'month'
+        try:
+            periods = min(max(int(request.GET.get('periods', 12)), 1), 156)
+        except ValueError:
+            periods = 12
         
-        # Return updated data
-        data = {}
-        
-        if chart_type == 'risk_distribution' or chart_type == 'all':
-            high_risk = employees.filter(attrition_probability__gte=75).count()
-            medium_risk = employees.filter(attrition_probability__gte=50, attrition_probability__lt=75).count()
-            low_risk = employees.filter(attrition_probability__lt=50).count()
-            
-            data['risk_distribution'] = {
-                'labels': ['Low Risk', 'Medium Risk', 'High Risk'],
-                'data': [low_risk, medium_risk, high_risk]
-            }
-        
-        if chart_type == 'satisfaction' or chart_type == 'all':
-            data['satisfaction_data'] = get_satisfaction_analysis(employees)
+        data = cached_analytics(
+            analytics_cache_key('api', start_day, chart_type, granularity, periods),
+            lambda: get_analytics_api_data(start_day, chart_type, granularity, periods),
+        )
         
         return JsonResponse(data)
+
+
+def get_analytics_api_data(start_day, chart_type, granularity='month', periods=12):
+    """Chart data for analytics_api, from the in-memory employee columns (or the daily rollup)"""
+    if COLUMNAR_ANALYTICS:
+        summary = employee_columns.current().between(start_day)
+    else:
+        summary = RollupSummary.load(start_day)
+    data = {}
+    
+    if chart_type == 'risk_distribution' or chart_type == 'all':
+        stats = summary.headline_stats()
+        
+        data['risk_distribution'] = {
+            'labels': ['Low Risk', 'Medium Risk', 'High Risk'],
+            'data': [stats['low_risk'], stats['medium_risk'], stats['high_risk']]
+        }
+    
+    if chart_type == 'satisfaction' or chart_type == 'all':
+        data['satisfaction_data'] = summary.satisfaction_analysis()
+    
+    if chart_type == 'trend' or chart_type == 'all':
+        data['trend_data'] = summary.trend(periods=periods, granularity=granularity)
+    
+    return data
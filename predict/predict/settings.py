@@ -87,6 +87,10 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Take the write lock when a transaction starts, so concurrent writers wait
+        # (up to `timeout` seconds) instead of failing with "database is locked"
+        # when a read inside the transaction is followed by a write
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 20},
     }
 }
 
@@ -127,6 +131,28 @@ TAILWIND_APP_NAME = 'theme'
 
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+
+# Attrition model scoring backend: 'xgboost' (pickled model), 'native' (the
+# same booster converted by `manage.py convert_model`: UBJSON plus a JSON/.npy
+# sidecar, nothing unpickled) or 'compiled' (NumPy trees from
+# `manage.py compile_model`; lowest single-row latency, no xgboost/sklearn
+# import, but slower than xgboost on large CSV batches)
+ATTRITION_MODEL_BACKEND = os.environ.get('ATTRITION_MODEL_BACKEND', 'xgboost')
+
+# Load and warm the model at startup instead of on first use (set by wsgi.py/asgi.py)
+ATTRITION_MODEL_WARMUP = os.environ.get('ATTRITION_MODEL_WARMUP') == '1'
+
+# Versioned model artifacts (`manage.py model_registry`); web workers poll its
+# CURRENT pointer every ATTRITION_MODEL_RELOAD_INTERVAL seconds and hot-swap
+# new versions (0 = never). The upload worker checks between jobs.
+ATTRITION_MODEL_REGISTRY = BASE_DIR / 'models' / 'registry'
+ATTRITION_MODEL_RELOAD_INTERVAL = float(
+    os.environ.get('ATTRITION_MODEL_RELOAD_INTERVAL', '5' if ATTRITION_MODEL_WARMUP else '0')
+)
+
+# Uploaded CSVs waiting for the upload worker (python manage.py run_upload_worker)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -12,5 +12,7 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'predict.settings')
+# Web workers load the attrition model up front so the first request isn't slow
+os.environ.setdefault('ATTRITION_MODEL_WARMUP', '1')
 
 application = get_wsgi_application()